@@ -0,0 +1,436 @@
+# benchmark.py
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from collections import namedtuple
+from configparser import ConfigParser
+
+from track_parser import parse_track_title
+from window_monitor import FakeWindowSource, WindowSnapshotEngine
+from detection_rules import DEFAULT_RULES, RuleMatcher, RuleMonitor
+from config_store import ConfigStore
+from note_store import NoteStore
+from timeline import TimelineRecorder
+from window_trace import TraceRecorder, TraceReplayer, load_trace
+from text_fit import TextFitter
+
+# 原 get_current_track 中使用的正则
+LEGACY_PATTERN = r"^\s*(.+?)\s*[—-]\s*(.+?)(\s*-\s*QQ音乐)?\s*$"
+BILIBILI_TITLE = "哔哩哔哩 (゜-゜)つロ 干杯~-bilibili"
+
+
+def legacy_parse(title):
+    match = re.match(LEGACY_PATTERN, title)
+    return {
+        "title": match.group(1).strip(),
+        "artist": match.group(2).strip()
+    } if match else None
+
+
+def best_of(func, arg, number, repeat=3):
+    """返回单次调用的最短耗时（微秒）"""
+    timer = timeit.Timer(lambda: func(arg))
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def per_call(func, number, repeat=3):
+    """无参数版本的 best_of"""
+    return min(timeit.Timer(func).repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+# --------------------------
+# 标题解析
+# --------------------------
+def pathological_titles(n):
+    """让回溯正则退化的标题"""
+    return {
+        "normal": "晴天 - 周杰伦 - QQ音乐",
+        f"spaces_{n}": " " * n,
+        f"gap_{n}": "a" + " " * n + "x",
+        f"dash_gap_{n}": "a - b" + " " * n + "-" + " " * n + "!",
+        f"dashes_{n}": "a" + " -" * n,
+    }
+
+
+def bench_parser(sizes=(50, 100, 200)):
+    results = []
+    uncached = parse_track_title.__wrapped__
+    for n in sizes:
+        for name, title in pathological_titles(n).items():
+            number = 5 if "spaces" in name else 200
+            parse_track_title(title)  # 预热缓存
+            results.append({
+                "case": name,
+                "length": len(title),
+                "legacy_regex_us": round(best_of(legacy_parse, title, number), 2),
+                "linear_us": round(best_of(uncached, title, 1000), 2),
+                "cached_us": round(best_of(parse_track_title, title, 10000), 3),
+            })
+    return results
+
+
+# --------------------------
+# 窗口监控
+# --------------------------
+def synthetic_windows(n):
+    """n 个可见窗口：大量浏览器/工具窗口，QQ音乐和B站放在最后（扫描的最坏情况）"""
+    classes = ["Chrome_WidgetWin_1", "Qt5152QWindowIcon", "Shell_TrayWnd",
+               "ApplicationFrameWindow", "Notepad", "CabinetWClass"]
+    windows = [(classes[i % len(classes)], f"窗口 {i} - 工具") for i in range(max(0, n - 2))]
+    windows.append(("TXGuiFoundation", "晴天 - 周杰伦 - QQ音乐"))
+    windows.append(("Chrome_WidgetWin_1", f"【4K】某视频 - {BILIBILI_TITLE} - Google Chrome"))
+    return windows
+
+
+def legacy_two_pass(source):
+    """旧实现：两个监控器各自完整扫描一遍，再用回溯正则解析标题"""
+    qq = None
+    for record in source.enum_windows():
+        if "TXGuiFoundation" in record.class_name:
+            qq = record
+            break
+    playing = any(BILIBILI_TITLE in record.title and "Chrome_WidgetWin_1" in record.class_name
+                  for record in source.enum_windows())
+    return (legacy_parse(qq.title) if qq else None), playing
+
+
+def bench_monitors(sizes=(50, 1000, 10000)):
+    results = []
+    for n in sizes:
+        source = FakeWindowSource(synthetic_windows(n))
+        engine = WindowSnapshotEngine(source)
+        monitor = engine.register(RuleMonitor(RuleMatcher(DEFAULT_RULES)))
+        engine.tick()  # 预热分类缓存
+        snapshot = engine.snapshot
+
+        def steady_detect():
+            # 稳定状态下的检测部分：求差异 + 监控器处理差异
+            monitor.on_diff(engine._diff(snapshot), snapshot)
+
+        number = max(3, 20000 // n)
+        results.append({
+            "case": f"windows_{n}",
+            "enum_only_us": round(per_call(source.enum_windows, number), 2),
+            "legacy_two_pass_us": round(per_call(lambda: legacy_two_pass(source), number), 2),
+            "shared_rule_tick_us": round(per_call(engine.tick, number), 2),
+            "full_rescan_us": round(per_call(lambda: monitor.on_snapshot(snapshot), number), 2),
+            "diff_detect_us": round(per_call(steady_detect, 20000), 3),
+        })
+    return results
+
+
+class LegacyWindowSource(FakeWindowSource):
+    """旧的记录方式：每次枚举都新建 namedtuple 和新的字符串（模拟 win32gui 每次返回新对象）"""
+
+    Record = namedtuple('Record', ['hwnd', 'class_name', 'title'])
+
+    def enum_windows(self):
+        self.enum_calls += 1
+        return [
+            self.Record(hwnd, class_name.encode().decode(), title.encode().decode())
+            for hwnd, (class_name, title, visible) in self._windows.items()
+            if visible
+        ]
+
+
+def bench_memory(sizes=(50, 1000), ticks=100):
+    """tracemalloc 统计稳定状态下每个tick新分配（峰值）和留下（净增）的字节数"""
+    results = []
+    for n in sizes:
+        row = {"case": f"windows_{n}"}
+        for name, source_type in (("legacy", LegacyWindowSource), ("interned", FakeWindowSource)):
+            source = source_type(synthetic_windows(n))
+            engine = WindowSnapshotEngine(source)
+            engine.register(RuleMonitor(RuleMatcher(DEFAULT_RULES)))
+            for _ in range(3):
+                engine.tick()  # 预热缓存
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            peak = 0
+            for _ in range(ticks):
+                engine.tick()
+                peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+                tracemalloc.reset_peak()
+            retained = tracemalloc.get_traced_memory()[0] - before
+            tracemalloc.stop()
+            row[f"{name}_peak_bytes"] = peak
+            row[f"{name}_retained_per_tick"] = round(retained / ticks, 1)
+        results.append(row)
+    return results
+
+
+def synthetic_session(path, windows=300, hours=2, seed=1):
+    """录一段模拟会话：每3分钟切歌，不时打开/关闭B站标签，其他窗口标题偶尔变化"""
+    import random
+    rng = random.Random(seed)
+    now = [0.0]
+    source = FakeWindowSource(synthetic_windows(windows)[:-2])
+    qq = source.add_window("TXGuiFoundation", "晴天 - 周杰伦 - QQ音乐")
+    others = [record.hwnd for record in source.enum_windows() if record.hwnd != qq]
+    bilibili = None
+    recorder = TraceRecorder(path, clock=lambda: now[0])
+    for second in range(hours * 3600):
+        now[0] = float(second)
+        if second % 180 == 0:
+            source.set_title(qq, f"歌曲{second // 180} - 歌手{rng.randrange(50)} - QQ音乐")
+        if rng.random() < 0.002:
+            if bilibili is None:
+                bilibili = source.add_window("Chrome_WidgetWin_1", f"视频 - {BILIBILI_TITLE} - Google Chrome")
+            else:
+                source.remove_window(bilibili)
+                bilibili = None
+        if rng.random() < 0.05:
+            source.set_title(rng.choice(others), f"窗口 {second} - 工具")
+        recorder.record(source.enum_windows())
+    recorder.close()
+    return recorder
+
+
+def bench_replay(windows=300, hours=2):
+    """把录制的轨迹尽快回放进共享快照引擎，测每帧的检测耗时"""
+    workdir = tempfile.mkdtemp(prefix="live_assistant_bench_")
+    try:
+        path = os.path.join(workdir, "session.jsonl")
+        recorder = synthetic_session(path, windows, hours)
+        frames = load_trace(path)
+
+        def replay():
+            engine = WindowSnapshotEngine(FakeWindowSource())
+            engine.register(RuleMonitor(RuleMatcher(DEFAULT_RULES)))
+            TraceReplayer(frames, engine.source).replay(engine, speed=0)
+
+        elapsed = min(timeit.Timer(replay).repeat(repeat=3, number=1))
+        return [{
+            "case": f"session_{windows}w_{hours}h",
+            "ticks": recorder.ticks,
+            "frames": len(frames),
+            "trace_kb": round(os.path.getsize(path) / 1024, 1),
+            "per_frame_us": round(elapsed / len(frames) * 1e6, 2),
+        }]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# --------------------------
+# 持久化
+# --------------------------
+def bench_persistence():
+    workdir = tempfile.mkdtemp(prefix="live_assistant_bench_")
+    try:
+        path = os.path.join(workdir, "config.ini")
+        if os.path.exists("config.ini"):
+            shutil.copy("config.ini", path)
+        legacy = ConfigParser()
+        legacy.read(path, encoding='utf-8')
+
+        def legacy_save():
+            # 旧版 save_position / save_custom_text：每次事件都整文件重写
+            legacy['Position'] = {'x': '100', 'y': '200'}
+            with open(path, 'w', encoding='utf-8') as f:
+                legacy.write(f)
+
+        store = ConfigStore(path)
+        counter = [0]
+
+        def store_flush_changed():
+            counter[0] += 1
+            store.config['Position'] = {'x': str(counter[0]), 'y': '200'}
+            store.mark_dirty()
+            store.flush()
+
+        def store_flush_unchanged():
+            store.mark_dirty()
+            store.flush()
+
+        notes = NoteStore(os.path.join(workdir, "notes.jsonl"), min_compact=10 ** 9)
+        timeline = TimelineRecorder(os.path.join(workdir, "timeline"))
+        rows = [
+            {"case": "legacy_config_rewrite", "us": per_call(legacy_save, 200)},
+            {"case": "config_mark_dirty", "us": per_call(store.mark_dirty, 100000)},
+            {"case": "config_flush_changed_atomic", "us": per_call(store_flush_changed, 100)},
+            {"case": "config_flush_unchanged", "us": per_call(store_flush_unchanged, 2000)},
+            {"case": "note_append", "us": per_call(lambda: notes.append("复习嵌入式系统"), 2000)},
+            {"case": "timeline_record", "us": per_call(lambda: timeline.track("QQ音乐", "晴天", "周杰伦"), 100000)},
+            {"case": "timeline_flush_1000", "us": per_call(
+                lambda: ([timeline.track("QQ音乐", "晴天", "周杰伦") for _ in range(1000)], timeline.flush()), 5)},
+        ]
+        notes.close()
+        for row in rows:
+            row["us"] = round(row["us"], 3)
+        return rows
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# --------------------------
+# 标签刷新
+# --------------------------
+class StubLabel:
+    """没有显示器时代替 tk.Label，只记录配置"""
+
+    def __init__(self):
+        self.options = {}
+
+    def config(self, **options):
+        self.options.update(options)
+
+
+class StubFont:
+    """没有显示器时代替 tkinter.font.Font：汉字按两倍宽"""
+
+    def measure(self, text):
+        return sum(14 if ord(char) > 0x2E80 else 7 for char in text)
+
+
+def bench_label():
+    root = None
+    try:
+        import tkinter as tk
+        from tkinter import font
+        root = tk.Tk()
+        root.withdraw()
+        label = tk.Label(root, text="初始化中...")
+        label.pack()
+        # 与 layout = fixed 相同：标签放在不随内容变化大小的容器里
+        fixed_frame = tk.Frame(root, width=420, height=label.winfo_reqheight())
+        fixed_frame.pack_propagate(False)
+        fixed_frame.pack()
+        fixed_label = tk.Label(fixed_frame, text="初始化中...")
+        fixed_label.pack()
+        label_font = font.nametofont(label.cget('font'))
+        backend = "tk"
+    except Exception:
+        label = StubLabel()
+        label_font = StubFont()
+        backend = "stub"
+
+    tracks = [{"title": "晴天", "artist": "周杰伦"}, {"title": "稻香", "artist": "周杰伦"}]
+    counter = [0]
+
+    def show_track():
+        # 与 LiveAssistant.show_track 相同的格式化 + config
+        counter[0] += 1
+        track = tracks[counter[0] & 1]
+        label.config(text=f"QQ音乐：{track['title']} - {track['artist']}", fg="#EBF3EB")
+
+    def show_track_and_idle():
+        show_track()
+        if root is not None:
+            root.update_idletasks()  # 把几何重算也计入
+
+    fitter = TextFitter(label_font)
+    titles = [f"QQ音乐：{track['title']}（Live 版）很长很长的歌名 {n} - {track['artist']}"
+              for n in range(50) for track in tracks]
+
+    # 反复显示的几首歌（少于 cache_size，应全部命中截断缓存）和不断出现的新标题（每次都要截断）
+    recent = titles[:fitter.cache_size // 4]
+
+    def fit_recent():
+        counter[0] += 1
+        fitter.fit(recent[counter[0] % len(recent)], 400)
+
+    def fit_title():
+        counter[0] += 1
+        fitter.fit(titles[counter[0] % len(titles)], 400)
+
+    def measure_title():
+        counter[0] += 1
+        label_font.measure(titles[counter[0] % len(titles)])
+
+    cached_us = per_call(fit_recent, 5000)
+    assert fitter.hits > 0, "fit_text_cached 没有命中截断缓存"
+    truncate_us = per_call(fit_title, 5000)  # 100 个标题轮流，超过 cache_size，稳定后不会命中
+    rows = [{"case": "label_config", "backend": backend, "us": round(per_call(show_track, 5000), 3)},
+            {"case": "fit_text_cached", "backend": backend, "us": round(cached_us, 3)},
+            {"case": "fit_text_truncate", "backend": backend, "us": round(truncate_us, 3)},
+            {"case": "measure_line", "backend": backend, "us": round(per_call(measure_title, 5000), 3)}]
+    if root is not None:
+        rows.append({"case": "label_config_relayout", "backend": backend,
+                     "us": round(per_call(show_track_and_idle, 500), 3)})
+        label = fixed_label
+        rows.append({"case": "label_config_fixed_relayout", "backend": backend,
+                     "us": round(per_call(show_track_and_idle, 500), 3)})
+        root.destroy()
+    return rows
+
+
+# --------------------------
+# 运行与对比
+# --------------------------
+SUITES = {
+    "parser": bench_parser,
+    "monitors": bench_monitors,
+    "replay": bench_replay,
+    "memory": bench_memory,
+    "persistence": bench_persistence,
+    "label": bench_label,
+}
+
+
+def run(names):
+    return {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": {name: SUITES[name]() for name in names},
+    }
+
+
+def compare(current, baseline_path):
+    """打印与基线结果的耗时比值（当前/基线，大于1表示变慢）"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)["results"]
+    print(f"== 与 {baseline_path} 对比（当前/基线） ==")
+    for suite, rows in current["results"].items():
+        old_rows = {row["case"]: row for row in baseline.get(suite, [])}
+        for row in rows:
+            old = old_rows.get(row["case"])
+            if old is None:
+                continue
+            for key, value in row.items():
+                if key.endswith("us") and isinstance(old.get(key), (int, float)) and old[key]:
+                    print(f"{suite:>12} {row['case']:>28} {key:>20} {value / old[key]:8.2f}x")
+
+
+def print_table(title, rows):
+    print(f"== {title} ==")
+    if not rows:
+        return
+    keys = list(rows[0])
+    print("  ".join(f"{key:>16}" for key in keys))
+    for row in rows:
+        print("  ".join(f"{str(row[key]):>16}" for key in keys))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="直播助手热点路径性能测试（微秒/次）")
+    parser.add_argument("suites", nargs="*", metavar="suite",
+                        help=f"要运行的测试组（{'/'.join(SUITES)}），默认全部")
+    parser.add_argument("--json", help="把结果写入JSON文件，便于不同版本之间对比")
+    parser.add_argument("--compare", help="与之前保存的JSON结果对比")
+    args = parser.parse_args()
+    unknown = [name for name in args.suites if name not in SUITES]
+    if unknown:
+        parser.error(f"未知的测试组: {', '.join(unknown)}")
+
+    started = time.perf_counter()
+    report = run(args.suites or list(SUITES))
+    for name, rows in report["results"].items():
+        print_table(name, rows)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        compare(report, args.compare)
+    print(f"总耗时 {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,82 @@
+# config_store.py
+import io
+import os
+import tempfile
+from configparser import ConfigParser
+
+# --------------------------
+# 配置存储模块
+# --------------------------
+class ConfigStore:
+    """配置常驻内存，修改后只标记为脏，由调用方按间隔或退出时 flush()
+
+    写入先写临时文件再 os.replace 替换，写到一半崩溃也不会丢掉原来的记事内容；
+    内容与上次写入相同时跳过写盘。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.config = ConfigParser()
+        self._last_written = None
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                text = f.read()
+            self.config.read_string(text, source=path)
+            self._last_written = self._serialize()
+        self.dirty = False
+        # 统计
+        self.writes = 0
+        self.coalesced = 0  # 已经是脏状态时的再次修改，合并进同一次写入
+        self.unchanged = 0  # flush 时内容没变，跳过写盘
+
+    @property
+    def writes_avoided(self):
+        return self.coalesced + self.unchanged
+
+    def mark_dirty(self):
+        if self.dirty:
+            self.coalesced += 1
+        self.dirty = True
+
+    def flush(self):
+        """有修改时原子写回文件，返回是否真的写了盘"""
+        if not self.dirty:
+            return False
+        self.dirty = False
+        text = self._serialize()
+        if text == self._last_written:
+            self.unchanged += 1
+            return False
+        self._atomic_write(text)
+        self._last_written = text
+        self.writes += 1
+        return True
+
+    def stats(self):
+        return {
+            "writes": self.writes,
+            "writes_avoided": self.writes_avoided,
+            "coalesced": self.coalesced,
+            "unchanged": self.unchanged,
+        }
+
+    def _serialize(self):
+        buffer = io.StringIO()
+        self.config.write(buffer)
+        return buffer.getvalue()
+
+    def _atomic_write(self, text):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.config-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
@@ -14,7 +14,20 @@ def list_all_windows():
     return results
 
 if __name__ == "__main__":
-    windows = list_all_windows()
-    print(f"共找到 {len(windows)} 个可见窗口：")
-    for win in windows:
-        print(win)
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="列出所有可见窗口的类名和标题")
+    parser.add_argument("--record", metavar="TRACE", help="持续录制窗口变化到轨迹文件（Ctrl+C 停止），可用 window_trace.py 回放")
+    parser.add_argument("--interval", type=float, default=1.0, help="录制间隔（秒）")
+    parser.add_argument("--duration", type=float, help="录制时长（秒），默认直到 Ctrl+C")
+    args = parser.parse_args()
+
+    if args.record:
+        from window_monitor import Win32WindowSource
+        from window_trace import record_source
+        recorder = record_source(Win32WindowSource(), args.record, args.interval, args.duration)
+        print(f"已录制 {recorder.ticks} 次，其中 {recorder.frames} 次有变化：{args.record}")
+    else:
+        windows = list_all_windows()
+        print(f"共找到 {len(windows)} 个可见窗口：")
+        for win in windows:
+            print(win)
\ No newline at end of file
@@ -0,0 +1,255 @@
+# detection_rules.py
+import re
+from collections import OrderedDict
+from functools import lru_cache
+
+from track_parser import parse_track_title
+from window_monitor import SnapshotDiff
+
+# --------------------------
+# 规则定义
+# --------------------------
+ROLE_NOW_PLAYING = "now_playing"  # 正在播放：解析标题并显示
+ROLE_DISTRACTION = "distraction"  # 摸鱼应用：出现时暂停计时
+RULE_SECTION_PREFIX = "Rule:"
+PARSE_DASH = "dash"  # 内置线性解析器：“歌名 - 歌手 - 后缀”
+
+
+class DetectionRule:
+    """一条应用识别规则：类名关键字 + 标题关键字（都是子串匹配），可选标题解析方式
+
+    parse 为 "dash" 时使用内置的线性解析器（suffix 为要去掉的结尾，如 QQ音乐），
+    否则当作正则表达式：歌名取命名组 title 或第一个分组，歌手取命名组 artist 或第二个分组，
+    没有歌手分组或歌手分组没匹配上时歌手为空。两种方式的结果都按标题缓存。
+    """
+
+    def __init__(self, name, role, class_keyword="", title_keyword="", parse=None, label=None,
+                 suffix=""):
+        if role not in (ROLE_NOW_PLAYING, ROLE_DISTRACTION):
+            raise ValueError(f"规则 {name} 的 role 无效: {role}")
+        self.name = name
+        self.role = role
+        self.class_keyword = class_keyword
+        self.title_keyword = title_keyword
+        self.label = label or name
+        self.suffix = suffix
+        self.parse_pattern = None
+        if parse == PARSE_DASH:
+            self.parse_title = self._parse_dash
+        elif parse:
+            try:
+                self.parse_pattern = re.compile(parse)
+            except re.error as e:
+                raise ValueError(f"规则 {name} 的 parse 正则无效: {e}")
+            names = self.parse_pattern.groupindex
+            groups = self.parse_pattern.groups
+            if "title" in names:
+                self.title_group = "title"
+                self.artist_group = "artist" if "artist" in names else None
+            elif groups >= 1:
+                self.title_group = 1
+                self.artist_group = 2 if groups >= 2 else None
+            else:
+                raise ValueError(f"规则 {name} 的 parse 正则需要命名组 title 或至少一个分组: {parse}")
+            self.parse_title = lru_cache(maxsize=64)(self._parse_regex)
+        else:
+            self.parse_title = self._parse_none
+
+    def _parse_none(self, title):
+        return None
+
+    def _parse_dash(self, title):
+        return parse_track_title(title, self.suffix)
+
+    def _parse_regex(self, title):
+        """用解析正则拆出歌名和歌手，支持命名组 title/artist 或前两个分组"""
+        match = self.parse_pattern.match(title)
+        if not match:
+            return None
+        song = (match.group(self.title_group) or "").strip()
+        if not song:
+            return None
+        artist = match.group(self.artist_group) if self.artist_group is not None else None
+        return {
+            "title": song,
+            "artist": (artist or "").strip()
+        }
+
+
+DEFAULT_RULES = [
+    DetectionRule("qqmusic", ROLE_NOW_PLAYING, class_keyword="TXGuiFoundation",
+                  parse=PARSE_DASH, suffix="QQ音乐", label="QQ音乐"),
+    DetectionRule("bilibili", ROLE_DISTRACTION, class_keyword="Chrome_WidgetWin_1",
+                  title_keyword="哔哩哔哩 (゜-゜)つロ 干杯~-bilibili", label="哔哩哔哩"),
+]
+
+
+def load_rules(config):
+    """读取 config.ini 中所有 [Rule:xxx] 段，没有配置时使用默认规则"""
+    rules = []
+    for section in config.sections():
+        if not section.startswith(RULE_SECTION_PREFIX):
+            continue
+        get = lambda key: config.get(section, key, raw=True, fallback="")
+        rules.append(DetectionRule(
+            section[len(RULE_SECTION_PREFIX):],
+            get("role"),
+            class_keyword=get("class"),
+            title_keyword=get("title"),
+            parse=get("parse") or None,
+            label=get("label") or None,
+            suffix=get("suffix")
+        ))
+    return rules or list(DEFAULT_RULES)
+
+
+# --------------------------
+# 组合匹配器
+# --------------------------
+class RuleMatcher:
+    """把所有规则编译成一个组合正则，一次匹配就给窗口分类
+
+    匹配键为 "类名\\x1f标题"，每条规则是一个命名分支，按配置顺序优先。
+    分类结果按 (类名, 标题) 记忆（LRU），只有记忆命中时才是一次字典查找、与规则数量无关；
+    第一次见到的窗口要跑一遍组合正则，开销仍随规则数增长。
+    记忆容量至少为 cache_size，并由 reserve() 按窗口数扩大，窗口再多也不会整体失效。
+    """
+
+    SEPARATOR = "\x1f"
+
+    def __init__(self, rules, cache_size=1024):
+        self.rules = list(rules)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        branches = [
+            f"(?P<r{idx}>(?=[^\x1f]*{re.escape(rule.class_keyword)})[^\x1f]*\x1f.*{re.escape(rule.title_keyword)})"
+            for idx, rule in enumerate(self.rules)
+        ]
+        self._pattern = re.compile("|".join(branches), re.DOTALL) if branches else None
+
+    def classify(self, class_name, title):
+        """返回第一条命中的规则，没有命中返回None"""
+        key = (class_name, title)
+        cache = self._cache
+        try:
+            rule = cache[key]
+        except KeyError:
+            pass
+        else:
+            cache.move_to_end(key)
+            return rule
+
+        rule = None
+        if self._pattern is not None:
+            match = self._pattern.match(f"{class_name}{self.SEPARATOR}{title}")
+            if match:
+                rule = self.rules[int(match.lastgroup[1:])]
+        cache[key] = rule
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)  # 只淘汰最久没用到的一条
+        return rule
+
+    def reserve(self, windows):
+        """按当前窗口数扩大记忆容量（留出一倍余量给标题变化）"""
+        if windows * 2 > self.cache_size:
+            self.cache_size = windows * 2
+
+    @property
+    def now_playing_label(self):
+        """第一条正在播放规则的名称，用于“未播放”提示"""
+        for rule in self.rules:
+            if rule.role == ROLE_NOW_PLAYING:
+                return rule.label
+        return ""
+
+
+# --------------------------
+# 规则监控器
+# --------------------------
+class RuleMonitor:
+    """按规则给窗口分类，得出正在播放的曲目和出现的摸鱼应用
+
+    只保存命中规则的窗口（句柄 -> (规则, 记录)），每个tick只对新增和标题变化的窗口分类；
+    命中的窗口有变化时才重新汇总，没有变化时开销与窗口总数无关。
+    """
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.track = None
+        self.track_rule = None
+        self.distractions = frozenset()
+        self._matches = {}
+
+    def on_snapshot(self, snapshot):
+        """不带差异的完整快照：全部重新分类（一个都没命中时也要重新汇总，清掉上一次的结果）"""
+        self._matches = {}
+        if not self.on_diff(SnapshotDiff(tuple(snapshot), (), ()), snapshot):
+            self._summarize(snapshot)
+
+    def on_diff(self, diff, snapshot):
+        """只分类新增和改标题的窗口，返回命中的窗口是否有变化"""
+        self.matcher.reserve(len(snapshot))
+        matches = self._matches
+        changed = False
+        for record in diff.removed:
+            if matches.pop(record.hwnd, None) is not None:
+                changed = True
+        classify = self.matcher.classify
+        for record in diff.added + diff.retitled:
+            rule = classify(record.class_name, record.title)
+            if rule is not None:
+                matches[record.hwnd] = (rule, record)
+                changed = True
+            elif matches.pop(record.hwnd, None) is not None:
+                changed = True
+        if changed:
+            self._summarize(snapshot)
+        return changed
+
+    def _summarize(self, snapshot):
+        candidates = []
+        distractions = set()
+        for rule, record in self._matches.values():
+            if rule.role == ROLE_DISTRACTION:
+                distractions.add(rule.name)
+            else:
+                candidates.append((rule, record))
+        if len(candidates) > 1:
+            # 和逐个扫描时一样，取枚举顺序中第一个能解析出曲目的窗口
+            order = {record.hwnd: position for position, record in enumerate(snapshot)}
+            candidates.sort(key=lambda candidate: order.get(candidate[1].hwnd, len(order)))
+        track = None
+        track_rule = None
+        for rule, record in candidates:
+            track = rule.parse_title(record.title)
+            if track:
+                track_rule = rule
+                break
+        self.track = track
+        self.track_rule = track_rule
+        self.distractions = frozenset(distractions)
+
+    def get_current_track(self):
+        return self.track
+
+    def is_distracted(self):
+        return bool(self.distractions)
+
+
+# --------------------------
+# 本地自测：增量分类与完整扫描一致
+# --------------------------
+if __name__ == "__main__":
+    from window_monitor import fuzz_incremental
+
+    rules = DEFAULT_RULES + [
+        DetectionRule("chrome", ROLE_NOW_PLAYING, class_keyword="Chrome_WidgetWin_1",
+                      parse=r"(?P<title>.+?) - (?P<artist>.+) - Google Chrome", label="Chrome"),
+        DetectionRule("notepad", ROLE_DISTRACTION, class_keyword="Notepad", title_keyword="记事本"),
+    ]
+    observe = lambda monitor: (monitor.track, monitor.track_rule and monitor.track_rule.name,
+                               monitor.distractions)
+    for seed in range(3):
+        # cache_size 很小时也要一致（分类记忆被淘汰后重新匹配）
+        fuzz_incremental(lambda source: RuleMonitor(RuleMatcher(rules, cache_size=4)), observe, 20000, seed)
+    print("自测通过")
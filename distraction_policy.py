@@ -0,0 +1,171 @@
+# distraction_policy.py
+import time
+
+# --------------------------
+# 摸鱼判定策略
+# --------------------------
+STATE_FOCUSED = "focused"    # 没有摸鱼
+STATE_ENTERING = "entering"  # 出现了摸鱼应用，等待 enter_grace 确认
+STATE_PAUSED = "paused"      # 已确认摸鱼，计时应暂停
+STATE_LEAVING = "leaving"    # 摸鱼应用消失，等待 exit_grace 和 min_pause 确认
+
+
+class DistractionPolicy:
+    """由监控结果驱动的摸鱼状态机，决定计时是否应该自动暂停
+
+    摸鱼应用连续出现 enter_grace 秒才暂停，全部消失 exit_grace 秒才恢复（进出两个阈值，防抖），
+    且每次暂停至少持续 min_pause 秒；per_app 可以按应用名（[Rule:xxx] 的名称）覆盖宽限时间。
+    页面跳转时标题闪一下不会再造成暂停/恢复风暴，被忽略的切换会计数。
+    """
+
+    def __init__(self, enter_grace=2.0, exit_grace=3.0, min_pause=10.0, per_app=None,
+                 clock=time.monotonic):
+        self.enter_grace = enter_grace
+        self.exit_grace = exit_grace
+        self.min_pause = min_pause
+        self.per_app = per_app or {}  # 应用名 -> {"enter_grace": 秒, "exit_grace": 秒}
+        self.clock = clock
+        self.state = STATE_FOCUSED
+        self.active = frozenset()
+        self._first_seen = {}  # 应用名 -> 本次连续出现的开始时间
+        self._paused_at = None
+        self._gone_at = None
+        self._paused_apps = set()
+        # 统计
+        self.pauses = 0
+        self.resumes = 0
+        self.suppressed_pauses = 0   # 出现后没到宽限时间就消失，没有暂停
+        self.suppressed_resumes = 0  # 消失后没到宽限时间又出现，没有恢复
+
+    @property
+    def paused(self):
+        return self.state in (STATE_PAUSED, STATE_LEAVING)
+
+    def grace(self, app, key):
+        return self.per_app.get(app, {}).get(key, getattr(self, key))
+
+    def update(self, apps=None):
+        """输入当前出现的摸鱼应用（None 表示没有新的监控结果，只按时间推进），返回是否应暂停"""
+        now = self.clock()
+        if apps is not None:
+            self._observe(apps, now)
+        self._step(now)
+        return self.paused
+
+    def next_deadline(self):
+        """状态机下一次可能按时间变化的时刻，不需要定时检查时返回None"""
+        if self.state == STATE_ENTERING:
+            return min(self._first_seen[app] + self.grace(app, 'enter_grace') for app in self.active)
+        if self.state == STATE_LEAVING:
+            return max(self._gone_at + self._exit_grace(), self._paused_at + self.min_pause)
+        return None
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "pauses": self.pauses,
+            "resumes": self.resumes,
+            "suppressed_pauses": self.suppressed_pauses,
+            "suppressed_resumes": self.suppressed_resumes,
+        }
+
+    def _observe(self, apps, now):
+        active = frozenset(apps)
+        for app in active:
+            self._first_seen.setdefault(app, now)
+        for app in [app for app in self._first_seen if app not in active]:
+            del self._first_seen[app]
+        self.active = active
+
+    def _exit_grace(self):
+        return max((self.grace(app, 'exit_grace') for app in self._paused_apps), default=self.exit_grace)
+
+    def _step(self, now):
+        active = self.active
+        if self.state in (STATE_FOCUSED, STATE_ENTERING):
+            if not active:
+                if self.state == STATE_ENTERING:
+                    self.suppressed_pauses += 1
+                self.state = STATE_FOCUSED
+            elif any(now - self._first_seen[app] >= self.grace(app, 'enter_grace') for app in active):
+                self.state = STATE_PAUSED
+                self._paused_at = now
+                self._paused_apps = set(active)
+                self.pauses += 1
+            else:
+                self.state = STATE_ENTERING
+        elif active:
+            self._paused_apps |= active
+            if self.state == STATE_LEAVING:
+                self.suppressed_resumes += 1
+            self.state = STATE_PAUSED
+            self._gone_at = None
+        else:
+            if self._gone_at is None:
+                self._gone_at = now
+            if now - self._gone_at >= self._exit_grace() and now - self._paused_at >= self.min_pause:
+                self.state = STATE_FOCUSED
+                self._paused_apps = set()
+                self._gone_at = None
+                self.resumes += 1
+            else:
+                self.state = STATE_LEAVING
+
+
+def load_policy(config, clock=time.monotonic, rule_prefix="Rule:"):
+    """从 [Distraction] 读取默认值，从各 [Rule:xxx] 段读取 enter_grace/exit_grace 覆盖"""
+    per_app = {}
+    for section in config.sections():
+        if not section.startswith(rule_prefix):
+            continue
+        overrides = {key: config.getfloat(section, key) for key in ('enter_grace', 'exit_grace')
+                     if config.has_option(section, key)}
+        if overrides:
+            per_app[section[len(rule_prefix):]] = overrides
+    return DistractionPolicy(
+        enter_grace=config.getfloat('Distraction', 'enter_grace', fallback=2.0),
+        exit_grace=config.getfloat('Distraction', 'exit_grace', fallback=3.0),
+        min_pause=config.getfloat('Distraction', 'min_pause', fallback=10.0),
+        per_app=per_app,
+        clock=clock
+    )
+
+
+# --------------------------
+# 模拟测试
+# --------------------------
+def simulate():
+    """标题闪烁的B站页面：新旧两种判定方式的暂停/恢复次数对比"""
+    now = [0.0]
+    policy = DistractionPolicy(enter_grace=2, exit_grace=3, min_pause=10,
+                               per_app={"douyin": {"enter_grace": 0}}, clock=lambda: now[0])
+    # 每秒一次监控结果：(开始秒, 结束秒, 应用)
+    sessions = [(10, 11, "bilibili"), (20, 21, "bilibili"),      # 页面跳转时闪一下
+                (30, 60, "bilibili"), (45, 46, None),            # 看了半分钟，中间闪断一次
+                (80, 81, "douyin")]                              # 抖音不设宽限，立即暂停
+    naive_toggles = 0
+    naive_paused = False
+    toggles = 0
+    paused = False
+    for second in range(120):
+        now[0] = float(second)
+        apps = {app for start, end, app in sessions if app and start <= second < end}
+        if any(app is None and start <= second < end for start, end, app in sessions):
+            apps = set()
+        if bool(apps) != naive_paused:
+            naive_paused = bool(apps)
+            naive_toggles += 1
+        if policy.update(apps) != paused:
+            paused = policy.paused
+            toggles += 1
+    assert naive_toggles == 10, naive_toggles
+    assert (policy.pauses, policy.resumes) == (2, 2), policy.stats()
+    assert toggles == 4
+    assert policy.suppressed_pauses == 2 and policy.suppressed_resumes == 1, policy.stats()
+    return naive_toggles, toggles, policy.stats()
+
+
+if __name__ == "__main__":
+    naive, toggles, stats = simulate()
+    print(f"直接切换 {naive} 次，状态机切换 {toggles} 次，{stats}")
+    print("模拟通过")
@@ -0,0 +1,138 @@
+# focus_stats.py
+import json
+import os
+from datetime import date, datetime, timedelta
+
+from timeline import STATE_FOCUS, STATE_PAUSE, STATE_AUTO, IntervalRecord, iter_records
+
+# --------------------------
+# 专注统计模块
+# --------------------------
+def _empty_bucket():
+    # focus：专注秒数，paused：手动暂停秒数，lost：摸鱼自动暂停秒数，interruptions：中断次数
+    return {"focus": 0.0, "paused": 0.0, "lost": 0.0, "interruptions": 0}
+
+
+def week_key(day):
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02}"
+
+
+def split_by_day(start, end):
+    """把 [start, end] 时间戳区间按本地日期切开，产出 (date, 秒数)"""
+    current = datetime.fromtimestamp(start)
+    finish = datetime.fromtimestamp(end)
+    while current < finish:
+        midnight = datetime.combine(current.date() + timedelta(days=1), datetime.min.time())
+        piece_end = min(midnight, finish)
+        yield current.date(), (piece_end - current).total_seconds()
+        current = piece_end
+
+
+class FocusStats:
+    """预先汇总的专注统计，区间结束时增量更新
+
+    按天、按ISO周和按摸鱼应用分别累加，打开统计面板只需读这份汇总，
+    不会重新扫描历史时间线；一年的数据也只有几百个小字典。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.daily = {}
+        self.weekly = {}
+        self.distractions = {}  # 应用名 -> {"count", "lost"}
+        self.dirty = False
+        self.loaded = False  # False 时统计文件不存在或已损坏，需要从时间线重建
+        if os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+                self.daily = data.get("daily", {})
+                self.weekly = data.get("weekly", {})
+                self.distractions = data.get("distractions", {})
+                self.loaded = True
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"[ERROR] 读取专注统计失败，将从时间线重建: {str(e)}")
+                self.daily, self.weekly, self.distractions = {}, {}, {}
+
+    def add_interval(self, record):
+        """累加一个已结束的区间（作为 TimelineRecorder 的 listener）"""
+        self._apply(self.daily, self.weekly, self.distractions, record)
+        self.dirty = True
+
+    def rebuild_from_timeline(self, directory):
+        """统计文件不存在时，从历史时间线重建一次"""
+        self.daily, self.weekly, self.distractions = {}, {}, {}
+        for record in iter_records(directory):
+            if isinstance(record, IntervalRecord):
+                self._apply(self.daily, self.weekly, self.distractions, record)
+        self.dirty = True
+
+    def save(self):
+        """有变化时写回（临时文件 + 替换）"""
+        if not self.dirty:
+            return False
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "daily": self.daily,
+                "weekly": self.weekly,
+                "distractions": self.distractions
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+        return True
+
+    def summary(self, today=None, open_interval=None):
+        """今日、本周、累计和各摸鱼应用的汇总；open_interval 为尚未结束的当前区间"""
+        today = today or date.today()
+        daily = {today.isoformat(): dict(self.daily.get(today.isoformat(), _empty_bucket()))}
+        weekly = {week_key(today): dict(self.weekly.get(week_key(today), _empty_bucket()))}
+        distractions = {name: dict(value) for name, value in self.distractions.items()}
+        if open_interval is not None:
+            self._apply(daily, weekly, distractions, open_interval)
+
+        total = _empty_bucket()
+        for bucket in self.daily.values():
+            for key in total:
+                total[key] += bucket[key]
+        if open_interval is not None:
+            # 当前区间同样计入累计，否则累计会比今日还少
+            pending = {}
+            self._apply(pending, {}, {}, open_interval)
+            for bucket in pending.values():
+                for key in total:
+                    total[key] += bucket[key]
+        return {
+            "today": daily.get(today.isoformat(), _empty_bucket()),
+            "week": weekly.get(week_key(today), _empty_bucket()),
+            "total": total,
+            "distractions": distractions,
+        }
+
+    @staticmethod
+    def _apply(daily, weekly, distractions, record):
+        field = {STATE_FOCUS: "focus", STATE_PAUSE: "paused", STATE_AUTO: "lost"}.get(record.state)
+        if field is None or record.end <= record.start:
+            return
+        first = True
+        for day, seconds in split_by_day(record.start, record.end):
+            for bucket in (daily.setdefault(day.isoformat(), _empty_bucket()),
+                           weekly.setdefault(week_key(day), _empty_bucket())):
+                bucket[field] += seconds
+                # 同一区间的后续片段不再算一次中断
+                if first and record.state != STATE_FOCUS and not record.continued:
+                    bucket["interruptions"] += 1
+            first = False
+        if record.state == STATE_AUTO:
+            for name in filter(None, record.detail.split(",")):
+                app = distractions.setdefault(name, {"count": 0, "lost": 0.0})
+                app["count"] += 0 if record.continued else 1
+                app["lost"] += record.end - record.start
+
+
+def format_duration(seconds):
+    """秒数转成 “3小时25分” 这样的文字"""
+    minutes = int(seconds) // 60
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}小时{minutes:02}分" if hours else f"{minutes}分"
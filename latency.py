@@ -0,0 +1,119 @@
+# latency.py
+import time
+from bisect import bisect_right
+from functools import wraps
+
+# --------------------------
+# 延迟直方图
+# --------------------------
+# 桶边界：1微秒到约65秒，每个桶宽 2^(1/4)（约19%），分位数误差不超过一个桶
+BUCKET_BOUNDS = tuple(1e-6 * 2 ** (i / 4) for i in range(105))
+
+
+class LatencyHistogram:
+    """对数分桶的耗时直方图，记录一次只做一次二分查找和几个加法"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect_right(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """第 q 百分位（秒），取所在桶的上边界，不超过最大值"""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                bound = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+# --------------------------
+# 记录器
+# --------------------------
+class LatencyRecorder:
+    """按名称收集回调耗时和事件循环延迟
+
+    enabled 为 False 时 wrap() 原样返回函数、instrument() 什么都不做，
+    关闭时没有任何额外开销。
+    """
+
+    LAG = "event_loop_lag"
+
+    def __init__(self, enabled=False, clock=time.perf_counter):
+        self.enabled = enabled
+        self.clock = clock
+        self.histograms = {}
+        self.started = time.time()
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        return histogram
+
+    def record(self, name, seconds):
+        self.histogram(name).record(seconds)
+
+    def record_lag(self, seconds):
+        """调度器回调：定时器实际触发时间比计划晚了多少"""
+        self.histogram(self.LAG).record(max(0.0, seconds))
+
+    def wrap(self, name, func):
+        """返回带计时的 func，未启用时返回 func 本身"""
+        if not self.enabled:
+            return func
+        histogram = self.histogram(name)
+        clock = self.clock
+
+        @wraps(func)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.record(clock() - start)
+        return timed
+
+    def instrument(self, obj, *names):
+        """把 obj 上的方法替换成计时版本（必须在方法被绑定/注册之前调用）"""
+        if not self.enabled:
+            return
+        for name in names:
+            setattr(obj, name, self.wrap(name, getattr(obj, name)))
+
+    def report(self):
+        """各项的次数、平均值和分位数（毫秒），按p99从高到低"""
+        lines = [f"延迟统计 {time.strftime('%Y-%m-%d %H:%M:%S')}，"
+                 f"已运行 {time.time() - self.started:.0f} 秒（单位：毫秒）",
+                 f"{'name':<20}{'count':>8}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}"]
+        ordered = sorted(self.histograms.items(), key=lambda item: -item[1].percentile(99))
+        for name, histogram in ordered:
+            if not histogram.count:
+                continue
+            values = [histogram.mean(), histogram.percentile(50), histogram.percentile(90),
+                      histogram.percentile(99), histogram.max]
+            lines.append(f"{name:<20}{histogram.count:>8}" + "".join(f"{v * 1000:>10.3f}" for v in values))
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """把报告追加写入文件，返回报告文本"""
+        text = self.report()
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(text + "\n\n")
+        return text
@@ -1,148 +1,119 @@
 # live_assistant_final.py
-import re
 import time
-import win32gui
+STARTED = time.perf_counter()  # 启动计时起点
 import tkinter as tk
 from tkinter import font, ttk  # 修改此行
-from configparser import ConfigParser
-from ctypes import windll
-from PIL import Image, ImageDraw
-import pystray
-import threading
+from window_monitor import WindowSnapshotEngine, Win32WindowSource
+from detection_rules import RuleMatcher, RuleMonitor, load_rules
+from window_events import WinEventHookSource
+from monitor_worker import MonitorWorker
+from scheduler import TickScheduler
+from pomodoro import PomodoroTimer
+from config_store import ConfigStore
+from note_store import NoteStore
+from note_view import NoteListView
+from timeline import TimelineRecorder, STATE_FOCUS, STATE_PAUSE, STATE_AUTO
+from focus_stats import FocusStats, format_duration
+from latency import LatencyRecorder
+from lyrics import LyricsLibrary
+from timers import TimerEngine, parse_reminder, KIND_REMINDER, KIND_CYCLE, PHASE_WORK
+from warm_state import load_warm_state, save_warm_state, state_age
+from distraction_policy import load_policy
+from text_fit import TextFitter
+from marquee import Marquee
+# PIL、pystray、win32gui 等较重的模块在第一次用到时才导入
+IMPORTED = time.perf_counter()
+
 # --------------------------
 # 配置加载模块
 # --------------------------
-config = ConfigParser()
-config.read('config.ini', encoding='utf-8')
+# 导入时不读配置文件，创建主窗口时才读取
+config_store = None
+config = None
 
-# --------------------------
-# 番茄钟模块
-# --------------------------
-class PomodoroTimer:
-    def __init__(self, app):
-        self.app = app
-        self.is_running = False
-        self.start_time = 0
-        self.total_seconds = 0
-        self.paused_time = 0
-        self.paused_by_external = False  # 新增：标记是否因外部原因（如B站）暂停
-        self._update_loop = None  # 用于存储定时器ID
-
-    def start(self):
-        """启动番茄钟"""
-        if not self.is_running:
-            self.is_running = True
-            self.start_time = time.time() - self.paused_time
-            self._schedule_update()
-
-    def _schedule_update(self):
-        """使用after调度计时更新"""
-        if self.is_running:
-            elapsed = int(time.time() - self.start_time)
-            self.total_seconds = elapsed
-            self.app.update_pomodoro_display(elapsed)
-            self._update_loop = self.app.after(1000, self._schedule_update)
-
-    def pause_or_resume(self, is_external=False):
-            if self.is_running:
-                # 暂停逻辑
-                self.is_running = False
-                self.paused_time = time.time() - self.start_time
-                self.paused_by_external = is_external
-                if self._update_loop:
-                    self.app.after_cancel(self._update_loop)
-            else:
-                # 恢复逻辑
-                self.is_running = True
-                self.start_time = time.time() - self.paused_time
-                self.paused_by_external = False
-                self._schedule_update()
-
-   
-
-    def get_elapsed_time(self):
-        if self.is_running:
-            return time.time() - self.start_time
-        return self.paused_time
-
-    def update_timer(self):
-         while self.is_running:
-            elapsed = int(time.time() - self.start_time)
-            self.total_seconds = elapsed
-            self.app.update_pomodoro_display(elapsed)
-            time.sleep(1)
 
-# --------------------------
-# 哔哩哔哩监控模块
-# --------------------------
-class BilibiliMonitor:
-    @staticmethod
-    def is_playing():
-        def callback(hwnd, handles):
-            if win32gui.IsWindowVisible(hwnd):
-                class_name = win32gui.GetClassName(hwnd)
-                title = win32gui.GetWindowText(hwnd)
-                if "哔哩哔哩 (゜-゜)つロ 干杯~-bilibili" in title and "Chrome_WidgetWin_1" in class_name:
-                    handles.append(hwnd)
-            return True
-
-        handles = []
-        win32gui.EnumWindows(callback, handles)
-        return len(handles) > 0
-    
-# --------------------------
-# QQ音乐监控模块
-# --------------------------
-class QQMusicMonitor:
-    @staticmethod
-    def get_window_handle():
-        """获取QQ音乐窗口句柄"""
-        def callback(hwnd, handles):
-            if win32gui.IsWindowVisible(hwnd):
-                class_name = win32gui.GetClassName(hwnd)
-                if "TXGuiFoundation" in class_name:
-                    handles.append(hwnd)
-            return True
-
-        handles = []
-        win32gui.EnumWindows(callback, handles)
-        return handles[0] if handles else None
-
-    @classmethod
-    def get_current_track(cls):
-        """解析播放信息"""
-        hwnd = cls.get_window_handle()
-        if not hwnd:
-            return None
-
-        title = win32gui.GetWindowText(hwnd)
-        match = re.match(
-            r"^\s*(.+?)\s*[—-]\s*(.+?)(\s*-\s*QQ音乐)?\s*$", 
-            title
-        )
-        return {
-            "title": match.group(1).strip(),
-            "artist": match.group(2).strip()
-        } if match else None
+def open_config(path='config.ini'):
+    global config_store, config
+    config_store = ConfigStore(path)
+    config = config_store.config
 
 # --------------------------
 # GUI主程序
 # --------------------------
 class LiveAssistant(tk.Tk):
     def __init__(self):
+        if config_store is None:
+            open_config()
         super().__init__()
-        self.entries = []  # 输入框列表
-        self.init_ui()
-        self.setup_tray()
+        self.monitor_state = None
+        self.monitor_worker = None
+        self.window_events = None
+        self.tray_icon = None
+        self.overlay = None
+        self.first_paint_at = None
+        self.first_data_at = None
+        self.shut_down = False
+        self.setup_scheduler()
         self.load_config()
+        self.setup_latency()
+        self.init_ui()
         self.setup_drag()
         self.setup_key_bindings()  # 新增此行
-        self.after(100, self.update_display)
-        self.pomodoro = PomodoroTimer(self)
+        self.setup_timeline()
+        self.setup_timers()
+        self.distraction = load_policy(config, clock=self.scheduler.clock)
+        self.pomodoro = PomodoroTimer(self.scheduler, self.update_pomodoro_display,
+                                      clock=self.scheduler.clock,
+                                      on_change=self.on_pomodoro_change)
+        self.latency.instrument(self.pomodoro, '_tick')
         self.init_pomodoro_ui()  # 新增初始化番茄钟UI
-        self.after(1000, self.check_bilibili_loop)
+        self.restore_warm_state()
+        self.protocol('WM_DELETE_WINDOW', self.destroy_app)
+
+        # 托盘和窗口检测等第一帧画出来之后再初始化
+        self.after_idle(self.on_first_paint)
 
+    def on_first_paint(self):
+        self.first_paint_at = time.perf_counter()
+        self.setup_tray()
+        self.setup_overlay()
+        self.setup_lyrics()
+        self.setup_monitors()
+
+    def report_startup(self):
+        print(f"[INFO] 启动耗时：导入 {(IMPORTED - STARTED) * 1000:.0f}ms，"
+              f"首次绘制 {(self.first_paint_at - STARTED) * 1000:.0f}ms，"
+              f"首次检测结果 {(self.first_data_at - STARTED) * 1000:.0f}ms")
+
+    def restore_warm_state(self):
+        """先画出上次退出时的播放信息和计时，后台检测出结果后再替换
+
+        上次退出距今不超过 [Storage] 的 resume_within 秒时接着上次的计时继续，
+        否则从0开始。
+        """
+        self.warm_state_file = config.get('Storage', 'warm_state_file', fallback='warm_state.json')
+        state = load_warm_state(self.warm_state_file)
+        if state and state.get('track_text'):
+            self.set_line(self.label, state['track_text'],
+                          fg=state.get('track_color') or config.get('UI', 'color', fallback='#00FF00'))
+        if state and state_age(state) <= config.getint('Storage', 'resume_within', fallback=600):
+            self.pomodoro.restore(state.get('elapsed', 0))
+            if not state.get('running', True):
+                self.on_pomodoro_change()
+                self.update_pomodoro_button()
+                return
         self.pomodoro.start()
+
+    def save_warm_state(self):
+        try:
+            save_warm_state(
+                self.warm_state_file, self.label.cget('text'), self.label.cget('fg'),
+                self.pomodoro.get_elapsed_time(),
+                # 摸鱼自动暂停算作计时中，下次启动时由检测结果决定是否再暂停
+                self.pomodoro.is_running or self.pomodoro.paused_by_external
+            )
+        except OSError as e:
+            print(f"[ERROR] 保存启动缓存失败: {str(e)}")
     
     def init_ui(self):
         """初始化界面"""
@@ -159,15 +130,32 @@ class LiveAssistant(tk.Tk):
             size=config.getint('UI', 'font_size', fallback=14)
         )
 
-        # 播放信息标签
+        # 播放信息标签（各放在一个容器里，fixed 布局时容器大小固定）
+        self.track_frame = tk.Frame(self, bg='#1A1A1A')
+        self.track_frame.pack(padx=20, pady=2)
         self.label = tk.Label(
-            self,
+            self.track_frame,
             text="初始化中...",
             fg=config.get('UI', 'color', fallback='#00FF00'),
             bg='#1A1A1A',
             font=self.font_style
         )
-        self.label.pack(padx=20, pady=2)
+        self.label.pack()
+
+        # 歌词标签（启用歌词库且找到歌词时才显示）
+        self.lyric_frame = tk.Frame(self, bg='#1A1A1A')
+        self.lyric_label = tk.Label(
+            self.lyric_frame,
+            text="",
+            fg="#B4B4B4",
+            bg='#1A1A1A',
+            font=self.font_style
+        )
+        self.lyric_label.pack()
+        self.lyric_line = ""
+        self.text_fitter = TextFitter(self.font_style)
+        self.setup_marquee()
+        self.apply_layout()
 
         # 窗口属性
         self.overrideredirect(True)
@@ -179,22 +167,353 @@ class LiveAssistant(tk.Tk):
         self.entry_frame = tk.Frame(self, bg='#1A1A1A')
         self.entry_frame.pack(pady=(0, 10), padx=20, fill='x')
 
-        # 加载已有输入框
+        # 加载已有记事（只为可见的行创建输入框）
+        self.note_store = NoteStore(config.get('Storage', 'notes_file', fallback='notes.jsonl'))
+        self.note_view = NoteListView(
+            self.entry_frame, self.note_store, self.font_style,
+            fg=config.get('UI', 'color', fallback="#FCFFFC"),
+            rows=config.getint('UI', 'note_rows', fallback=8)
+        )
         self.load_custom_text()
 
         # 初始空输入框
-        if not self.entries:
-            self.create_new_entry(config.get('CustomText', 'content0', fallback='欢迎~~'))
+        if not self.note_view.ids:
+            self.note_view.add('欢迎~~')
+
+    def apply_layout(self):
+        """按 [UI] 的 layout 设置播放信息和歌词行的宽度，字体或布局设置改变后再调用一次
+
+        auto   窗口随文字变宽变窄（原来的行为）
+        capped 文字超过 width 像素时截断加省略号，窗口最宽到 width
+        fixed  两行固定为 width 像素宽，换歌只重画标签，不再重算整个窗口的布局
+        """
+        self.layout = config.get('UI', 'layout', fallback='auto')
+        width = config.getint('UI', 'width', fallback=420)
+        self.text_fitter.reset()
+        # 标签自身的边框和内边距，截断宽度要扣掉
+        border = 2 * (int(self.label.cget('bd')) + int(self.label.cget('padx')) +
+                      int(self.label.cget('highlightthickness')))
+        self.text_width = width - border if self.layout in ('fixed', 'capped') else 0
+        for frame, label in ((self.track_frame, self.label), (self.lyric_frame, self.lyric_label)):
+            if self.layout == 'fixed':
+                frame.config(width=width, height=label.winfo_reqheight())
+                frame.pack_propagate(False)
+            else:
+                frame.pack_propagate(True)
+        if self.marquee is not None:
+            self.marquee.canvas.config(width=width, height=self.label.winfo_reqheight())
+            self.marquee.redraw()
+        for label in (self.label, self.lyric_label):
+            self.set_line(label, label.cget('text'))
+
+    def set_line(self, label, text, **options):
+        """设置一行文字，按当前布局截断（宽度查缓存，不逐次向Tk量整行）
+
+        启用跑马灯时播放信息行不截断，交给跑马灯滚动显示；隐藏的 self.label 仍保存完整文字和颜色。
+        """
+        if label is self.label and self.marquee is not None:
+            label.config(text=text, **options)
+            self.marquee.set_text(text, options.get('fg'))
+            return
+        label.config(text=self.text_fitter.fit(text, self.text_width), **options)
+
+    def setup_marquee(self):
+        """[UI] marquee = true 时播放信息改为在 Canvas 上滚动显示（宽度为 width，放得下时不滚动）"""
+        self.marquee = None
+        if not config.getboolean('UI', 'marquee', fallback=False):
+            return
+        canvas = tk.Canvas(self.track_frame, bg='#1A1A1A', highlightthickness=0, bd=0,
+                           width=config.getint('UI', 'width', fallback=420),
+                           height=self.label.winfo_reqheight())
+        self.label.pack_forget()
+        canvas.pack()
+        self.marquee = Marquee(canvas, self.scheduler, self.font_style,
+                               fps=config.getint('UI', 'marquee_fps', fallback=30),
+                               speed=config.getfloat('UI', 'marquee_speed', fallback=40),
+                               fill=self.label.cget('fg'))
+        # 窗口隐藏/最小化时停止动画，重新显示后继续
+        self.bind('<Map>', self.on_visibility_change, add='+')
+        self.bind('<Unmap>', self.on_visibility_change, add='+')
+
+    def on_visibility_change(self, event):
+        if event.widget is self and self.marquee is not None:
+            self.marquee.refresh()
+
+    def setup_scheduler(self):
+        """统一调度器：所有周期任务共用一个 after"""
+        self.scheduler = TickScheduler(
+            self.after, self.after_cancel,
+            merge_window=config.getint('Scheduler', 'merge_window_ms', fallback=100) / 1000
+        )
+        report_interval = config.getint('Scheduler', 'report_interval', fallback=0)
+        if report_interval > 0:
+            self.scheduler.add_job('scheduler_report', self.report_scheduler, report_interval)
+
+    def report_scheduler(self):
+        stats = self.scheduler.stats()
+        print(f"[INFO] 调度器：每分钟唤醒 {stats['wakeups_per_minute']} 次，"
+              f"任务周期 {stats['periods']}")
+        if self.monitor_worker:
+            worker = self.monitor_worker.stats()
+            print(f"[INFO] 窗口监控：枚举 {worker['ticks']} 次，丢弃 {worker['dropped']} 份，"
+                  f"跳过 {worker['superseded']} 份，过期 {worker['stale']} 份，"
+                  f"超出预算 {worker['overruns']} 次，事件 {worker['events']} 个")
+
+    def setup_latency(self):
+        """[Debug] latency = true 时给各个回调计时，并记录事件循环延迟；关闭时不包装任何函数"""
+        self.latency = LatencyRecorder(config.getboolean('Debug', 'latency', fallback=False))
+        self.latency_file = config.get('Debug', 'latency_file', fallback='latency_report.txt')
+        if self.latency.enabled:
+            self.scheduler.lag_listener = self.latency.record_lag
+            self.latency.instrument(self, 'update_display', 'check_bilibili', 'show_track',
+                                    'update_pomodoro_display', 'flush_config', 'flush_timeline',
+                                    'save_position')
+
+    def dump_latency(self, *args):
+        """把各项耗时分位数写入 latency_file"""
+        if not self.latency.enabled:
+            print("[INFO] 未启用延迟统计，请在 config.ini 的 [Debug] 中设置 latency = true")
+            return
+        try:
+            print(self.latency.dump(self.latency_file))
+        except OSError as e:
+            print(f"[ERROR] 写入延迟统计失败: {str(e)}")
+
+    def setup_overlay(self):
+        """[Overlay] enabled = true 时在本机开一个 HTTP/SSE 服务，供 OBS 浏览器源显示
+
+        overlay_server（连带 http.server 等）在这里才导入，关闭时不拖慢启动。
+        """
+        if not config.getboolean('Overlay', 'enabled', fallback=False):
+            return
+        from overlay_server import OverlayServer
+        overlay = OverlayServer(config.get('Overlay', 'host', fallback='127.0.0.1'),
+                                config.getint('Overlay', 'port', fallback=8765))
+        try:
+            port = overlay.start()
+        except OSError as e:
+            print(f"[ERROR] 叠加层服务启动失败: {str(e)}")
+            return
+        self.overlay = overlay
+        overlay.update_track("", "", "", self.label.cget('text'))
+        self.publish_timer()
+        print(f"[INFO] OBS 浏览器源地址: http://{overlay.host}:{port}/")
+
+    def publish_timer(self):
+        if self.overlay:
+            self.overlay.update_timer(self.pomodoro.is_running, self.pomodoro.get_elapsed_time())
+
+    def setup_lyrics(self):
+        """[Lyrics] enabled = true 时从本地 .lrc 歌词库显示当前歌词"""
+        self.lyrics_library = None
+        self.lyrics = None
+        self.lyrics_started = 0.0
+        if not config.getboolean('Lyrics', 'enabled', fallback=False):
+            return
+        self.lyrics_library = LyricsLibrary(config.get('Lyrics', 'directory', fallback='lyrics'))
+        self.lyrics_batch = config.getint('Lyrics', 'index_batch', fallback=20)
+        # 只 stat 文件，新增或修改过的歌词文件才重新读取；第一次建索引马上开始，分批进行
+        self.scheduler.add_job('lyrics_refresh', self.refresh_lyrics,
+                               config.getint('Lyrics', 'refresh_interval', fallback=60), delay=0)
+
+    def refresh_lyrics(self):
+        """每次最多读 index_batch 个歌词文件的开头，没读完的稍后接着读，大歌词库也不会卡住界面"""
+        library = self.lyrics_library
+        changed, _ = library.refresh(limit=self.lyrics_batch)
+        if library.remaining:
+            self.scheduler.run_soon('lyrics_refresh', 0.02)
+        elif changed and self.lyrics is None and self.monitor_state is not None:
+            # 索引刚更新，补查当前歌曲（不改变歌词的起始时刻）
+            self.load_lyrics(self.monitor_state.track)
+
+    def on_track_change(self, state):
+        """切歌时查一次歌词；QQ音乐标题里没有播放进度，以检测到切歌的时刻作为第0秒"""
+        if self.lyrics_library is None:
+            return
+        self.lyrics_started = self.scheduler.clock()
+        self.load_lyrics(state.track)
+
+    def load_lyrics(self, track):
+        self.lyrics = self.lyrics_library.find(track['title'], track['artist']) if track else None
+        if self.lyrics:
+            self.lyric_frame.pack(padx=20, pady=(0, 2), after=self.track_frame)
+        else:
+            self.lyric_frame.pack_forget()
+            self.scheduler.remove_job('lyrics')
+        self.update_lyric()
+
+    def update_lyric(self):
+        """显示当前歌词，并把下一次唤醒排在下一句开始的时刻（不逐秒扫描）"""
+        line = ""
+        if self.lyrics:
+            position = self.scheduler.clock() - self.lyrics_started
+            line = self.lyrics.line_at(position)
+            next_time = self.lyrics.next_time(position)
+            if next_time is None:
+                self.scheduler.remove_job('lyrics')
+            else:
+                delay = next_time - position + 0.01
+                self.scheduler.add_job('lyrics', self.update_lyric, delay, delay=delay, flexible=False)
+        if line != self.lyric_line:
+            self.lyric_line = line
+            self.set_line(self.lyric_label, line)
+        if self.overlay:
+            self.overlay.update_lyric(line)
+
+    def setup_monitors(self):
+        """后台线程枚举窗口（每个tick只枚举一次），按 [Rule:xxx] 规则一次分类"""
+        budget_ms = config.getint('Monitor', 'enum_budget_ms', fallback=200)
+        engine = WindowSnapshotEngine(Win32WindowSource(), budget=budget_ms / 1000)
+        rule_monitor = engine.register(RuleMonitor(RuleMatcher(load_rules(config))))
+
+        # event模式：窗口事件立即唤醒后台线程，轮询只作为低频兜底
+        event_mode = config.get('Monitor', 'mode', fallback='poll') == 'event'
+        interval = config.getint(
+            'Monitor', 'safety_interval' if event_mode else 'poll_interval',
+            fallback=5000 if event_mode else 1000
+        ) / 1000
+        self.monitor_worker = MonitorWorker(
+            engine, rule_monitor,
+            interval=None,  # 由调度器的 monitor 任务唤醒
+            queue_size=config.getint('Monitor', 'queue_size', fallback=4),
+            notify=self.notify_monitor_state,
+            event_gap=config.getint('Monitor', 'event_gap_ms', fallback=50) / 1000
+        )
+        self.latency.instrument(self.monitor_worker, 'tick_once')  # 后台线程的枚举+分类耗时
+        self.bind('<<MonitorState>>', self.update_display)
+        if event_mode:
+            self.window_events = WinEventHookSource()
+            self.window_events.start(self.monitor_worker.on_event)  # 钩子必须装在Tk主线程
+        self.monitor_worker.start()
+
+        # 输出稳定时逐步放慢轮询，检测到变化立即恢复
+        self.scheduler.add_job(
+            'monitor', self.monitor_worker.wake, interval, delay=0.1,
+            max_period=max(interval, config.getint('Monitor', 'max_interval', fallback=4000) / 1000),
+            backoff=config.getfloat('Monitor', 'backoff', fallback=2.0),
+            stable_after=config.getint('Monitor', 'stable_ticks', fallback=5)
+        )
+
+    def notify_monitor_state(self):
+        """后台线程调用：通知Tk主线程有新的监控快照"""
+        try:
+            self.event_generate('<<MonitorState>>', when='tail')
+        except (RuntimeError, tk.TclError):
+            pass  # 主循环已退出
+
+    def setup_timers(self):
+        """倒计时、记事提醒和番茄循环：共用一个定时器堆，待触发的定时器重启后继续"""
+        self.alert_text = None
+        self.timers = TimerEngine(self.scheduler,
+                                  config.get('Timers', 'file', fallback='timers.json'),
+                                  on_fire=self.on_timer_fire)
+        self.note_view.on_change = self.on_note_change
+
+    def on_note_change(self, note_id, text):
+        """记事末尾写 @25（分钟）、@90s、@1h 时设置提醒，删除记事或去掉后缀时取消
+
+        只改文字（如改错字）不会重新计时，已经提醒过的也不会再提醒；改了时长才重新设置。
+        """
+        reminder = parse_reminder(text) if text is not None else None
+        if reminder:
+            label, seconds = reminder
+            self.timers.set_reminder(note_id, seconds, label)
+        else:
+            self.timers.cancel_note(note_id)
+
+    def toggle_cycle(self, *args):
+        """开始/停止番茄工作-休息循环"""
+        if self.timers.stop_cycle():
+            self.show_alert("番茄循环已停止")
+            return
+        minutes = lambda key, default: config.getfloat('Timers', key, fallback=default) * 60
+        self.timers.start_cycle(
+            work=minutes('work_minutes', 25),
+            short_break=minutes('short_break_minutes', 5),
+            long_break=minutes('long_break_minutes', 15),
+            long_every=config.getint('Timers', 'long_break_every', fallback=4)
+        )
+        self.show_alert("🍅 番茄循环开始，专心工作")
+
+    def start_countdown(self, *args):
+        minutes = config.getfloat('Timers', 'countdown_minutes', fallback=10)
+        self.timers.add_countdown(minutes * 60, f"{minutes:g}分钟倒计时")
+        self.show_alert(f"⏳ {minutes:g}分钟倒计时开始")
+
+    def on_timer_fire(self, timer, phase):
+        if timer.kind == KIND_REMINDER:
+            text = f"⏰ {timer.label}"
+        elif timer.kind == KIND_CYCLE:
+            text = (f"☕ 休息一下（已完成 {timer.round} 个番茄）" if phase == PHASE_WORK
+                    else "🍅 休息结束，开始工作")
+        else:
+            text = f"⏰ {timer.label}结束"
+        self.bell()
+        self.show_alert(text)
+
+    def show_alert(self, text):
+        """在播放信息标签上临时显示提示，alert_seconds 秒后恢复"""
+        if self.alert_text is None:
+            self.alert_restore = (self.label.cget('text'), self.label.cget('fg'))
+        self.alert_text = text
+        self.set_line(self.label, text, fg='#FFD700')
+        self.scheduler.add_job('timer_alert', self.clear_alert,
+                               config.getfloat('Timers', 'alert_seconds', fallback=8))
+
+    def clear_alert(self):
+        self.scheduler.remove_job('timer_alert')
+        self.alert_text = None
+        if self.monitor_state is not None:
+            self.show_track()
+        else:
+            text, color = self.alert_restore
+            self.set_line(self.label, text, fg=color)
+
+    def setup_timeline(self):
+        """会话时间线：曲目变化和计时区间按天追加写入，定期批量写盘"""
+        timeline_dir = config.get('Storage', 'timeline_dir', fallback='timeline')
+        self.timeline = TimelineRecorder(timeline_dir)
+
+        # 专注统计随区间结束增量更新，统计文件丢失时才从时间线重建一次
+        self.focus_stats = FocusStats(config.get('Storage', 'stats_file', fallback='focus_stats.json'))
+        if not self.focus_stats.loaded:
+            self.focus_stats.rebuild_from_timeline(timeline_dir)
+        self.timeline.listeners.append(self.focus_stats.add_interval)
+        self.stats_window = None
+
+        self.scheduler.add_job('timeline_flush', self.flush_timeline,
+                               config.getint('Storage', 'timeline_flush', fallback=30))
+
+    def flush_timeline(self):
+        self.timeline.flush()
+        self.focus_stats.save()
+
+    def on_pomodoro_change(self):
+        """计时启动/暂停/恢复时记入时间线，并推送给叠加层"""
+        self.publish_timer()
+        if self.pomodoro.is_running:
+            self.timeline.state(STATE_FOCUS)
+        elif self.pomodoro.paused_by_external:
+            distractions = self.monitor_state.distractions if self.monitor_state else ()
+            self.timeline.state(STATE_AUTO, ",".join(sorted(distractions)))
+        else:
+            self.timeline.state(STATE_PAUSE)
 
     def setup_tray(self):
-        """系统托盘"""
+        """系统托盘（PIL 和 pystray 在这里才导入）"""
+        from PIL import Image, ImageDraw
+        import pystray
         image = Image.new('RGB', (64, 64), '#1A1A1A')
         draw = ImageDraw.Draw(image)
         draw.rectangle((16, 16, 48, 48), fill='#00FF00')
         
         menu = pystray.Menu(
-            pystray.MenuItem('退出', self.destroy_app),
-            pystray.MenuItem('显示窗口', self.deiconify)
+            pystray.MenuItem('专注统计', self.from_tray(self.show_stats)),
+            pystray.MenuItem('开始/停止番茄循环', self.from_tray(self.toggle_cycle)),
+            pystray.MenuItem('倒计时', self.from_tray(self.start_countdown)),
+            pystray.MenuItem('导出延迟统计', self.from_tray(self.dump_latency)),
+            pystray.MenuItem('退出', self.from_tray(self.destroy_app)),
+            pystray.MenuItem('显示窗口', self.from_tray(self.deiconify))
         )
         self.tray_icon = pystray.Icon(
             "live_assistant", 
@@ -202,6 +521,41 @@ class LiveAssistant(tk.Tk):
             "直播助手", 
             menu
         )
+        # 托盘在自己的线程里运行，不占用Tk主循环
+        self.tray_icon.run_detached()
+
+    def from_tray(self, action):
+        """托盘菜单回调在 pystray 的线程里执行，转交给Tk主线程"""
+        return lambda icon, item: self.after(0, action)
+
+    def show_stats(self, *args):
+        """专注统计面板：只读预先汇总的数据，不扫描历史时间线"""
+        summary = self.focus_stats.summary(open_interval=self.timeline.open_interval())
+        lines = []
+        for title, bucket in (("今日", summary['today']), ("本周", summary['week']), ("累计", summary['total'])):
+            lines.append(f"{title}专注 {format_duration(bucket['focus'])}，"
+                         f"中断 {bucket['interruptions']} 次，"
+                         f"摸鱼损失 {format_duration(bucket['lost'])}")
+        for name, app in sorted(summary['distractions'].items(), key=lambda item: -item[1]['lost']):
+            lines.append(f"{name}：{app['count']} 次，损失 {format_duration(app['lost'])}")
+        policy = self.distraction.stats()
+        lines.append(f"自动暂停 {policy['pauses']} 次，忽略标题闪烁 "
+                     f"{policy['suppressed_pauses'] + policy['suppressed_resumes']} 次")
+
+        if self.stats_window is None or not self.stats_window.winfo_exists():
+            self.stats_window = tk.Toplevel(self, bg='#1A1A1A')
+            self.stats_window.title("专注统计")
+            self.stats_window.wm_attributes("-topmost", True)
+            self.stats_label = tk.Label(
+                self.stats_window,
+                fg="#EBF3EB",
+                bg='#1A1A1A',
+                font=self.font_style,
+                justify='left'
+            )
+            self.stats_label.pack(padx=20, pady=10)
+        self.stats_label.config(text="\n".join(lines))
+        self.stats_window.lift()
 
     def setup_drag(self):
         """窗口拖动"""
@@ -268,12 +622,12 @@ class LiveAssistant(tk.Tk):
         # 绑定点击事件
         btn_canvas.tag_bind("pause_btn", "<Button-1>", lambda e: self.pause_or_resume_pomodoro())
 
-        # 定时检测哔哩哔哩
-        self.after(1000, self.check_bilibili)
-
     def pause_or_resume_pomodoro(self):
         """更新按钮状态"""
         self.pomodoro.pause_or_resume()
+        self.update_pomodoro_button()
+
+    def update_pomodoro_button(self):
         btn_canvas = self.time_label.master.winfo_children()[1]
         if self.pomodoro.is_running:
             btn_canvas.itemconfig(self.btn_text, text="❌")
@@ -283,7 +637,7 @@ class LiveAssistant(tk.Tk):
     
             
     def update_pomodoro_display(self, seconds):
-        """更新时间显示"""
+        """更新时间显示（只在显示值变化时被调用）"""
         h = seconds // 3600
         m = (seconds % 3600) // 60
         s = seconds % 60
@@ -295,101 +649,115 @@ class LiveAssistant(tk.Tk):
         self.pause_resume_btn.config(state='normal', text="暂停")
 
 
-    def check_bilibili_loop(self):
-        """替代线程的定时检测方法"""
-        self.check_bilibili()
-        self.after(1000, self.check_bilibili_loop)  # 每秒调度一次
-
     def check_bilibili(self):
-        """检测哔哩哔哩播放状态"""
-        is_playing = BilibiliMonitor.is_playing()
-        
-        # 情况1：检测到播放且计时正在运行 → 暂停计时
-        if is_playing and self.pomodoro.is_running:
-            self.pomodoro.pause_or_resume(is_external=True)   # 暂停计时
-            # self.label.config(text="检测到视频播放，计时已暂停", fg='#FF0000')
-        
-        # 情况2：未检测到播放且是被外部暂停 → 自动恢复
-        elif not is_playing and self.pomodoro.paused_by_external:
-            self.pomodoro.pause_or_resume()  # 恢复计时
-            # self.update_music_display()  # 恢复音乐显示
-
+        """检测摸鱼应用：监控结果交给 distraction 状态机，只在确认进入/离开摸鱼时暂停或恢复计时
+
+        标题闪一下（页面跳转）不会触发切换；宽限时间到期时由一次性的 distraction 任务再检查，
+        不依赖下一次监控结果。
+        """
+        if self.monitor_state is None:
+            return
+        self.apply_distraction(self.distraction.update(self.monitor_state.distractions))
+
+    def recheck_distraction(self):
+        self.apply_distraction(self.distraction.update())
+
+    def apply_distraction(self, paused):
+        # 情况1：确认在摸鱼且计时正在运行 → 暂停计时
+        if paused and self.pomodoro.is_running:
+            self.pomodoro.pause_or_resume(is_external=True)
+        # 情况2：确认已离开摸鱼且是被外部暂停 → 自动恢复
+        elif not paused and self.pomodoro.paused_by_external:
+            self.pomodoro.pause_or_resume()
+
+        deadline = self.distraction.next_deadline()
+        if deadline is None:
+            self.scheduler.remove_job('distraction')
+        else:
+            delay = max(0.0, deadline - self.scheduler.clock())
+            self.scheduler.add_job('distraction', self.recheck_distraction, max(delay, 1.0),
+                                   delay=delay, flexible=False)
 
-        
-    def update_display(self):
-        """更新音乐信息"""
+    def update_display(self, event=None):
+        """取后台线程最新的监控快照并应用，结果是否变化反馈给调度器"""
         try:
-            track = QQMusicMonitor.get_current_track()
-            display_text = f"QQ音乐：{track['title']} - {track['artist']}" if track else "QQ音乐未播放"
-            color = "#EBF3EB" if track else '#FF0000'
-            self.label.config(text=display_text, fg=color)
+            state = self.monitor_worker.drain_latest()
+            if state is None:
+                return
+            if self.first_data_at is None:
+                self.first_data_at = time.perf_counter()
+                self.report_startup()
+            previous = self.monitor_state
+            self.monitor_state = state
+            changed = (previous is None or previous.track != state.track
+                       or previous.distractions != state.distractions)
+            self.scheduler.report('monitor', changed)
+            if previous is None or previous.track != state.track:
+                track = state.track or {}
+                self.timeline.track(state.track_label, track.get('title', ''), track.get('artist', ''))
+                self.on_track_change(state)
+            if changed:
+                self.show_track()
+            self.check_bilibili()
         except Exception as e:
             print(f"[ERROR] 更新失败: {str(e)}")
-        finally:
-            self.after(1000, self.update_display)
 
-    def create_new_entry(self, content=""):
-        """创建新输入框"""
-        entry = tk.Entry(
-            self.entry_frame,
-            bg='#1A1A1A',
-            fg=config.get('UI', 'color', fallback="#FCFFFC"),
-            insertbackground="#B7B9B7",
-            font=self.font_style,
-            width=25,
-            highlightthickness=0,
-            relief='flat'
-        )
-        entry.insert(0, content)
-        entry.pack(fill='x', pady=2)
-        entry.bind('<Return>', lambda e: self.add_new_entry())
-        self.entries.append(entry)
-        entry.focus_set()  # 新增焦点设置
-        
-    def add_new_entry(self):
-        """新增输入框"""
-        self.create_new_entry()
-        self.save_custom_text()
+    def show_track(self):
+        """把最近一次检测到的播放信息显示到标签上（有定时提醒时先不覆盖）"""
+        if self.alert_text:
+            return
+        state = self.monitor_state
+        track = state.track
+        if track:
+            display_text = f"{state.track_label}：{track['title']} - {track['artist']}"
+        else:
+            display_text = f"{state.idle_label}未播放"
+        color = "#EBF3EB" if track else '#FF0000'
+        self.set_line(self.label, display_text, fg=color)
+        if self.overlay:
+            track = track or {}
+            self.overlay.update_track(state.track_label, track.get('title', ''),
+                                      track.get('artist', ''), display_text)
 
     def load_custom_text(self):
-        """加载配置"""
-        # 清空现有输入框
-        for entry in self.entries:
-            entry.destroy()
-        self.entries.clear()
-        
-        if config.has_section('CustomText'):
-            # 按数字排序 content0, content1...
-            contents = [
-                config.get('CustomText', key)
-                for key in sorted(config.options('CustomText'), 
-                               key=lambda x: int(x[7:]))
-                if key.startswith('content')
-            ]
-            for content in contents:
-                self.create_new_entry(content)
+        """加载记事，首次运行时从旧版 config.ini 的 [CustomText] 迁移"""
+        if config.has_section('CustomText') and not self.note_store.exists():
+            self.note_store.migrate_from_config(config)
+            config.remove_section('CustomText')
+            self.mark_config_dirty()
+        self.note_view.reload()
+
     def setup_key_bindings(self):
         """绑定键盘事件"""
         self.bind_all('<Delete>', self.delete_last_entry)
+        self.bind_all('<F7>', self.toggle_cycle)
+        self.bind_all('<F8>', self.start_countdown)
+        self.bind_all('<F9>', self.show_stats)
+        self.bind_all('<F12>', self.dump_latency)
 
     def delete_last_entry(self, event):
-        """删除最后一个输入框"""
-        if len(self.entries) > 1:  # 至少保留一个输入框
-            last_entry = self.entries.pop()
-            last_entry.destroy()
-            self.save_custom_text()
-            
+        """删除最后一条记事（至少保留一条）"""
+        self.note_view.delete_last()
+
     def save_custom_text(self, *args):
-        """保存配置"""
-        config.remove_section('CustomText')
-        config.add_section('CustomText')
-        for idx, entry in enumerate(self.entries):
-            config.set('CustomText', f'content{idx}', entry.get())
-        with open('config.ini', 'w', encoding='utf-8') as f:
-            config.write(f)
+        """保存可见输入框的内容（只写有变化的），其余记事早已在 NoteStore 中"""
+        self.note_view.save()
+
+    def mark_config_dirty(self):
+        """配置只改内存，flush_interval 秒后统一写盘一次"""
+        config_store.mark_dirty()
+        if 'config_flush' not in self.scheduler.jobs:
+            self.scheduler.add_job('config_flush', self.flush_config, self.config_flush_interval)
+
+    def flush_config(self):
+        config_store.flush()
+        self.scheduler.remove_job('config_flush')
 
     def load_config(self):
         """初始化配置"""
+        self.config_flush_interval = config.getfloat('Storage', 'flush_interval', fallback=5)
+        missing = [section for section in ('UI', 'Position')
+                   if not config.has_section(section)]
         if not config.has_section('UI'):
             config['UI'] = {
                 'font': '微软雅黑',
@@ -399,11 +767,9 @@ class LiveAssistant(tk.Tk):
             }
         if not config.has_section('Position'):
             config['Position'] = {'x': '100', 'y': '100'}
-        if not config.has_section('CustomText'):
-            config['CustomText'] = {'content0': '欢迎~~'}
-        # 立即保存初始配置
-        with open('config.ini', 'w', encoding='utf-8') as f:
-            config.write(f)
+        # 初始配置不再立即写盘，补了缺失的段才交给延迟写回保存
+        if missing:
+            self.mark_config_dirty()
 
     # 事件处理
     def start_drag(self, event):
@@ -417,17 +783,41 @@ class LiveAssistant(tk.Tk):
 
     def save_position(self, _):
         config['Position'] = {'x': self.winfo_x(), 'y': self.winfo_y()}
-        with open('config.ini', 'w', encoding='utf-8') as f:
-            config.write(f)
+        self.mark_config_dirty()
+
+    def shutdown(self):
+        """退出前保存所有状态并停止后台线程，只执行一次
+
+        托盘“退出”、关闭窗口（WM_DELETE_WINDOW）和主循环结束后都会调用；
+        某一步失败不影响后面的保存。
+        """
+        if self.shut_down:
+            return
+        self.shut_down = True
+        steps = [self.save_custom_text, self.note_store.close, self.timeline.close,
+                 self.focus_stats.save, self.save_warm_state]
+        for worker in (self.monitor_worker, self.window_events, self.overlay, self.tray_icon):
+            if worker:
+                steps.append(worker.stop)
+        steps.append(config_store.flush)
+        for step in steps:
+            try:
+                step()
+            except Exception as e:
+                print(f"[ERROR] 退出时保存失败: {str(e)}")
 
     def destroy_app(self):
-        self.tray_icon.stop()
+        self.shutdown()
         self.destroy()
 
 # --------------------------
 # 启动程序
 # --------------------------
 if __name__ == "__main__":
+    from ctypes import windll
     windll.shcore.SetProcessDpiAwareness(1)
     app = LiveAssistant()
-    app.mainloop()
\ No newline at end of file
+    try:
+        app.mainloop()
+    finally:
+        app.shutdown()
\ No newline at end of file
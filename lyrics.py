@@ -0,0 +1,209 @@
+# lyrics.py
+import os
+import re
+import unicodedata
+from bisect import bisect_right
+from collections import OrderedDict
+
+from track_parser import DASHES
+
+# --------------------------
+# LRC 解析
+# --------------------------
+TIME_TAG = re.compile(r"\[(\d+):(\d+(?:[.:]\d+)?)\]")
+INFO_TAG = re.compile(r"^\[(ti|ar|offset):([^\]]*)\]\s*$", re.IGNORECASE)
+# 规范化时去掉的字符：空白和常见标点
+_STRIP = re.compile(r"[\s\"'`~!@#$%^&*()\[\]{}<>,.;:?/\\|+=_·、，。！？：；（）【】《》“”‘’「」-]+")
+
+
+def normalize(text):
+    """歌名/歌手规范化：全角转半角、忽略大小写、去掉空白和标点"""
+    return _STRIP.sub("", unicodedata.normalize('NFKC', text or "").casefold())
+
+
+class Lyrics:
+    """一首歌的歌词，times 与 lines 一一对应且按时间排序"""
+
+    def __init__(self, times, lines, title="", artist=""):
+        self.times = times
+        self.lines = lines
+        self.title = title
+        self.artist = artist
+
+    def __len__(self):
+        return len(self.times)
+
+    def line_at(self, position):
+        """position 秒时应显示的歌词（二分查找），第一句之前返回空字符串"""
+        index = bisect_right(self.times, position) - 1
+        return self.lines[index] if index >= 0 else ""
+
+    def next_time(self, position):
+        """position 之后下一句歌词的开始时间，没有了返回None"""
+        index = bisect_right(self.times, position)
+        return self.times[index] if index < len(self.times) else None
+
+
+def parse_lrc(text):
+    """解析LRC文本，支持一行多个时间标签和 [offset:毫秒]"""
+    entries = []
+    info = {}
+    for raw in text.splitlines():
+        raw = raw.strip()
+        match = INFO_TAG.match(raw)
+        if match:
+            info[match.group(1).lower()] = match.group(2).strip()
+            continue
+        stamps = []
+        end = 0
+        for match in TIME_TAG.finditer(raw):
+            if match.start() != end:
+                break
+            seconds = match.group(2).replace(":", ".")
+            stamps.append(int(match.group(1)) * 60 + float(seconds))
+            end = match.end()
+        line = raw[end:].strip()
+        entries.extend((stamp, line) for stamp in stamps)
+    try:
+        offset = int(info.get("offset", "0")) / 1000
+    except ValueError:
+        offset = 0.0
+    entries.sort(key=lambda entry: entry[0])
+    # offset 为正表示歌词提前显示
+    return Lyrics([max(0.0, stamp - offset) for stamp, _ in entries],
+                  [line for _, line in entries],
+                  info.get("ti", ""), info.get("ar", ""))
+
+
+def read_header(path, limit=20):
+    """只读文件开头的 [ti:] [ar:] 标签，建索引时不用解析整首歌词"""
+    info = {}
+    with open(path, encoding='utf-8-sig', errors='replace') as f:
+        for _ in range(limit):
+            line = f.readline()
+            if not line:
+                break
+            match = INFO_TAG.match(line.strip())
+            if match:
+                info[match.group(1).lower()] = match.group(2).strip()
+            elif TIME_TAG.match(line.strip()):
+                break
+    return info.get("ti", ""), info.get("ar", "")
+
+
+# --------------------------
+# 歌词库
+# --------------------------
+class LyricsLibrary:
+    """本地 .lrc 歌词库，按规范化后的 (歌名, 歌手) 建索引
+
+    refresh() 只 stat 目录里的文件，修改时间没变的文件不会重新读取；传入 limit 时每次最多读
+    limit 个文件的开头，剩下的（remaining）留到下一次调用，第一次建大歌词库的索引也不会卡住界面；
+    切歌时 find() 是一次字典查找，解析结果按文件缓存 cache_size 首。
+    文件里没有 [ti:]/[ar:] 标签时按文件名 “歌手 - 歌名.lrc” 或 “歌名 - 歌手.lrc” 建索引。
+    """
+
+    def __init__(self, directory, cache_size=16):
+        self.directory = directory
+        self.cache_size = cache_size
+        self.index = {}   # (歌名, 歌手) -> 路径，歌手为空的键用于只按歌名查找
+        self._files = {}  # 路径 -> (修改时间, 索引键列表)
+        self._cache = OrderedDict()  # 路径 -> (修改时间, Lyrics)
+        self._pending = []  # 上次扫描发现、还没读取的 (路径, 修改时间)
+        # 统计
+        self.scans = 0
+        self.reads = 0
+
+    @property
+    def remaining(self):
+        """已发现但还没读取的文件数"""
+        return len(self._pending)
+
+    def refresh(self, limit=None):
+        """增量更新索引，返回本次 (新增或修改, 删除) 的文件数
+
+        上一次扫描的文件还没读完时先接着读，不重新扫描目录。
+        """
+        removed = []
+        if not self._pending:
+            removed = self._scan()
+        batch = self._pending[:limit] if limit is not None else list(self._pending)
+        del self._pending[:len(batch)]
+        changed = 0
+        for path, mtime in batch:
+            self._unindex(path)
+            try:
+                keys = self._keys_for(path)
+            except OSError:
+                continue
+            self._files[path] = (mtime, keys)
+            for key in keys:
+                self.index[key] = path
+            changed += 1
+        return changed, len(removed)
+
+    def _scan(self):
+        """stat 目录，删除已消失的文件，把新增或修改的文件放进待读列表，返回删除的路径"""
+        self.scans += 1
+        seen = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name.lower().endswith(".lrc"):
+                        seen[entry.path] = entry.stat().st_mtime
+        except OSError:
+            pass  # 目录不存在时当作空库
+
+        removed = [path for path in self._files if path not in seen]
+        for path in removed:
+            self._unindex(path)
+        self._pending = [(path, mtime) for path, mtime in seen.items()
+                         if self._files.get(path, (None,))[0] != mtime]
+        return removed
+
+    def find(self, title, artist=""):
+        """按歌名和歌手查找歌词，找不到返回None"""
+        title = normalize(title)
+        path = self.index.get((title, normalize(artist))) or self.index.get((title, ""))
+        if path is None:
+            return None
+        return self._load(path)
+
+    def _keys_for(self, path):
+        self.reads += 1
+        title, artist = read_header(path)
+        if title:
+            pairs = [(title, artist)]
+        else:
+            stem = os.path.splitext(os.path.basename(path))[0]
+            parts = re.split(f"\\s+[{re.escape(DASHES)}]\\s+", stem, maxsplit=1)
+            pairs = [(stem, "")] if len(parts) == 1 else [(parts[1], parts[0]), (parts[0], parts[1])]
+        keys = []
+        for title, artist in pairs:
+            keys.append((normalize(title), normalize(artist)))
+            keys.append((normalize(title), ""))
+        return keys
+
+    def _unindex(self, path):
+        known = self._files.pop(path, None)
+        if known is not None:
+            for key in known[1]:
+                if self.index.get(key) == path:
+                    del self.index[key]
+        self._cache.pop(path, None)
+
+    def _load(self, path):
+        mtime = self._files[path][0]
+        cached = self._cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            self._cache.move_to_end(path)
+            return cached[1]
+        try:
+            with open(path, encoding='utf-8-sig', errors='replace') as f:
+                lyrics = parse_lrc(f.read())
+        except OSError:
+            return None
+        self._cache[path] = (mtime, lyrics)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return lyrics
@@ -0,0 +1,170 @@
+# marquee.py
+
+# --------------------------
+# 跑马灯
+# --------------------------
+class Marquee:
+    """在一个 Canvas 上滚动显示放不下的播放信息
+
+    每首歌只创建一个文字项，之后每帧只 move 它的坐标，不重建字符串或控件；
+    整句滚出左边后从右边重新进入。文字放得下时居中显示并停止动画，
+    Canvas 不可见（窗口隐藏或最小化）时也停止，可见后调用 refresh() 继续。
+    动画是调度器里一个固定周期的 marquee 任务，fps 为每秒帧数，speed 为每秒移动的像素。
+    """
+
+    JOB_NAME = 'marquee'
+
+    def __init__(self, canvas, scheduler, font, fps=30, speed=40.0, fill='#EBF3EB'):
+        self.canvas = canvas
+        self.scheduler = scheduler
+        self.font = font
+        self.period = 1.0 / max(1, fps)
+        self.step = speed * self.period
+        self.fill = fill
+        self.text = None
+        self.item = None
+        self.text_width = 0
+        self.x = 0.0
+        self.running = False
+        # 统计
+        self.frames = 0
+
+    @property
+    def width(self):
+        return int(self.canvas.cget('width'))
+
+    def set_text(self, text, fill=None):
+        """显示新文字；文字没变只改颜色时不重建文字项"""
+        if fill is not None and fill != self.fill:
+            self.fill = fill
+            if self.item is not None:
+                self.canvas.itemconfig(self.item, fill=fill)
+        if text == self.text:
+            return
+        self.text = text
+        if self.item is not None:
+            self.canvas.delete(self.item)
+        y = int(self.canvas.cget('height')) // 2
+        self.item = self.canvas.create_text(0, y, text=text, anchor='w', fill=self.fill, font=self.font)
+        left, _, right, _ = self.canvas.bbox(self.item) or (0, 0, 0, 0)
+        self.text_width = right - left
+        # 放得下时居中，放不下时从左边开始滚
+        self.x = max(0, (self.width - self.text_width) // 2)
+        self.canvas.coords(self.item, self.x, y)
+        self.refresh()
+
+    def redraw(self):
+        """字体或 Canvas 大小改变后重新创建文字项"""
+        text, self.text = self.text, None
+        if text is not None:
+            self.set_text(text)
+
+    def refresh(self):
+        """按文字宽度和可见性启动或停止动画"""
+        needed = (self.item is not None and self.text_width > self.width
+                  and bool(self.canvas.winfo_viewable()))
+        if needed and not self.running:
+            self.running = True
+            self.scheduler.add_job(self.JOB_NAME, self._frame, self.period, flexible=False)
+        elif not needed and self.running:
+            self.running = False
+            self.scheduler.remove_job(self.JOB_NAME)
+
+    def stop(self):
+        self.running = False
+        self.scheduler.remove_job(self.JOB_NAME)
+
+    def _frame(self):
+        self.frames += 1
+        x = self.x - self.step
+        if x + self.text_width < 0:
+            # 整句滚出左边，从右边重新进入
+            x = float(self.width)
+            self.canvas.coords(self.item, x, int(self.canvas.cget('height')) // 2)
+        else:
+            self.canvas.move(self.item, x - self.x, 0)
+        self.x = x
+
+
+# --------------------------
+# 模拟测试
+# --------------------------
+class _FakeCanvas:
+    """只记录调用次数的 Canvas，每个字符按 10 像素宽"""
+
+    def __init__(self, width, height):
+        self.options = {'width': width, 'height': height}
+        self.items = {}
+        self.viewable = True
+        self.created = 0
+        self.moves = 0
+
+    def cget(self, key):
+        return self.options[key]
+
+    def winfo_viewable(self):
+        return self.viewable
+
+    def create_text(self, x, y, text, **options):
+        self.created += 1
+        self.items[self.created] = [x, y, text]
+        return self.created
+
+    def delete(self, item):
+        del self.items[item]
+
+    def itemconfig(self, item, **options):
+        pass
+
+    def bbox(self, item):
+        x, y, text = self.items[item]
+        return x, y - 8, x + 10 * len(text), y + 8
+
+    def coords(self, item, x, y):
+        self.items[item][:2] = [x, y]
+
+    def move(self, item, dx, dy):
+        self.moves += 1
+        self.items[item][0] += dx
+
+
+def simulate():
+    from scheduler import TickScheduler, SimulatedClock
+
+    clock = SimulatedClock()
+    scheduler = TickScheduler(clock.after, clock.after_cancel, clock=clock)
+    canvas = _FakeCanvas(200, 24)
+    marquee = Marquee(canvas, scheduler, font=None, fps=30, speed=60)
+
+    marquee.set_text("晴天 - 周杰伦")  # 放得下：居中，不动
+    assert not marquee.running and canvas.items[marquee.item][0] == 60
+    clock.advance(1)
+    assert marquee.frames == 0
+
+    long_title = "QQ音乐：" + "很长的歌名" * 10 + " - 歌手"
+    marquee.set_text(long_title)
+    assert marquee.running and canvas.created == 2 and len(canvas.items) == 1
+    clock.advance(2)
+    assert 55 <= marquee.frames <= 61, marquee.frames
+    assert abs(canvas.items[marquee.item][0] + 2 * 60) < 3, canvas.items  # 两秒移动约120像素
+    marquee.set_text(long_title, fill='#FF0000')  # 只改颜色不重建
+    assert canvas.created == 2
+
+    canvas.viewable = False  # 窗口隐藏
+    marquee.refresh()
+    frames = marquee.frames
+    clock.advance(2)
+    assert marquee.frames == frames and clock.pending() == 0
+    canvas.viewable = True
+    marquee.refresh()
+    clock.advance(20)  # 滚完一整轮后从右边重新进入
+    assert -marquee.text_width <= marquee.x <= marquee.width
+    marquee.set_text("稻香 - 周杰伦")
+    assert not marquee.running and clock.pending() == 0
+    return marquee.frames, canvas.moves
+
+
+if __name__ == "__main__":
+    frames, moves = simulate()
+    print(f"共 {frames} 帧，move {moves} 次")
+    print("模拟通过")
@@ -0,0 +1,165 @@
+# monitor_worker.py
+import queue
+import threading
+import time
+from collections import namedtuple
+
+# --------------------------
+# 监控状态快照
+# --------------------------
+# 后台线程产出、Tk主线程应用的一份监控结果
+MonitorState = namedtuple('MonitorState', [
+    'seq',           # 递增序号
+    'created',       # time.monotonic() 产出时间
+    'track',         # {"title", "artist"} 或 None
+    'track_label',   # 命中的正在播放规则名称，如 QQ音乐
+    'idle_label',    # 未播放时显示的名称
+    'distractions',  # 当前出现的摸鱼应用名称集合
+])
+
+
+class MonitorWorker(threading.Thread):
+    """后台监控线程：枚举窗口、跑规则，把状态快照放进有界队列
+
+    Tk主线程只调用 drain_latest() 取最新一份并应用，
+    慢的 GetWindowText 等调用不会再卡住拖动和输入。
+    interval 为 None 时不自己计时，只在 wake()/on_event() 时枚举（由调度器驱动）；
+    notify 在每次发布后于后台线程中调用，用来通知界面线程来取。
+    事件触发的枚举与上一次枚举至少间隔 event_gap 秒，间隔内到达的事件合并成一次，
+    菜单、提示框频繁显示隐藏或窗口不停改标题时不会连续全量枚举。
+    """
+
+    def __init__(self, engine, monitor, interval=1.0, queue_size=4, stale_after=3.0, notify=None,
+                 event_gap=0.05):
+        super().__init__(name="monitor-worker", daemon=True)
+        self.engine = engine
+        self.monitor = monitor
+        self.interval = interval
+        self.notify = notify
+        self.stale_after = stale_after
+        self.event_gap = event_gap
+        self.states = queue.Queue(maxsize=queue_size)
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._seq = 0
+        self._event_since = None
+        self._last_tick = float('-inf')
+        # 统计
+        self.ticks = 0
+        self.dropped = 0      # 队列满时被挤掉的快照
+        self.superseded = 0   # 一次取出多份时被跳过的旧快照
+        self.stale = 0        # 应用时已过期的快照
+        self.overruns = 0     # 超出枚举预算而放弃的tick
+        self.errors = 0
+        self.events = 0
+        self.event_ticks = 0  # 由事件触发的枚举次数，events - event_ticks 为被合并的事件
+        self.last_event_latency = 0.0
+
+    # ---------- 后台线程 ----------
+    def run(self):
+        while not self._stop_event.is_set():
+            self._wake.wait(self.interval)
+            if self._event_since is not None:
+                # 离上一次枚举太近时先等到间隔结束，期间的事件一起处理
+                remaining = self._last_tick + self.event_gap - time.monotonic()
+                if remaining > 0:
+                    self._stop_event.wait(remaining)
+            self._wake.clear()
+            if self._stop_event.is_set():
+                break
+            try:
+                self.tick_once()
+            except Exception as e:
+                self.errors += 1
+                print(f"[ERROR] 窗口监控失败: {str(e)}")
+
+    def tick_once(self):
+        """枚举一次并发布状态，超出预算时不发布（界面保留上一份状态）"""
+        event_since = self._event_since
+        self._event_since = None
+        self._last_tick = time.monotonic()
+        self.ticks += 1
+        if event_since is not None:
+            self.event_ticks += 1
+        self.engine.tick()
+        if self.engine.truncated:
+            self.overruns += 1
+            print(f"[WARN] 窗口枚举超出预算 {self.engine.budget * 1000:.0f}ms，本次结果已丢弃")
+            return None
+
+        self._seq += 1
+        monitor = self.monitor
+        track_rule = monitor.track_rule
+        state = MonitorState(
+            self._seq,
+            time.monotonic(),
+            monitor.track,
+            track_rule.label if track_rule else "",
+            monitor.matcher.now_playing_label,
+            monitor.distractions
+        )
+        self.publish(state)
+        if self.notify:
+            self.notify()
+        if event_since is not None:
+            self.last_event_latency = time.monotonic() - event_since
+        return state
+
+    def publish(self, state):
+        """放入有界队列，满了就挤掉最旧的一份"""
+        try:
+            self.states.put_nowait(state)
+        except queue.Full:
+            try:
+                dropped = self.states.get_nowait()
+                self.dropped += 1
+                print(f"[WARN] 界面线程来不及处理，丢弃监控快照 #{dropped.seq}（累计 {self.dropped} 份）")
+            except queue.Empty:
+                pass
+            self.states.put_nowait(state)
+
+    # ---------- 其他线程调用 ----------
+    def on_event(self, event, hwnd):
+        """窗口事件回调：立即唤醒后台线程"""
+        self.events += 1
+        if self._event_since is None:
+            self._event_since = time.monotonic()
+        self._wake.set()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake.set()
+
+    # ---------- Tk主线程调用 ----------
+    def drain_latest(self):
+        """取出队列里所有快照，只返回最新一份，没有新快照返回None"""
+        latest = None
+        count = 0
+        while True:
+            try:
+                latest = self.states.get_nowait()
+            except queue.Empty:
+                break
+            count += 1
+        if count > 1:
+            self.superseded += count - 1
+        if latest is not None and time.monotonic() - latest.created > self.stale_after:
+            self.stale += 1
+            print(f"[WARN] 监控快照 #{latest.seq} 已过期 {time.monotonic() - latest.created:.1f}s")
+        return latest
+
+    def stats(self):
+        return {
+            "ticks": self.ticks,
+            "dropped": self.dropped,
+            "superseded": self.superseded,
+            "stale": self.stale,
+            "overruns": self.overruns,
+            "errors": self.errors,
+            "events": self.events,
+            "event_ticks": self.event_ticks,
+            "last_event_latency": self.last_event_latency,
+        }
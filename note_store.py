@@ -0,0 +1,169 @@
+# note_store.py
+import json
+import os
+
+# --------------------------
+# 记事存储模块
+# --------------------------
+class NoteStore:
+    """记事本存储：追加写日志 + 定期压缩
+
+    每行一条 JSON 记录：
+        {"op": "add", "id": 3, "text": "..."}
+        {"op": "set", "id": 3, "text": "..."}
+        {"op": "del", "id": 3}
+        {"op": "meta", "next_id": 9}   （压缩时写在开头，保证删除过的ID不会被复用）
+    新增、修改、删除最后一行都只追加一行，O(1)；日志行数超过
+    compact_ratio 倍有效记事时重写成只含 add 的快照。
+    记事ID稳定递增，文件在第一次访问时才读取（懒加载）。
+    """
+
+    def __init__(self, path, compact_ratio=2.0, min_compact=64):
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self.min_compact = min_compact
+        self._notes = None  # id -> text，按插入顺序
+        self._next_id = 1
+        self._journal_lines = 0
+        self._file = None
+        self._needs_newline = False  # 文件末尾是写了一半的行
+        # 统计
+        self.appends = 0
+        self.compactions = 0
+
+    # ---------- 读取 ----------
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def __len__(self):
+        return len(self._load())
+
+    def __iter__(self):
+        """按顺序产出 (id, text)"""
+        return iter(list(self._load().items()))
+
+    def get(self, note_id, default=None):
+        return self._load().get(note_id, default)
+
+    # ---------- 修改 ----------
+    def append(self, text):
+        """追加一条记事，返回其ID"""
+        notes = self._load()
+        note_id = self._next_id
+        self._next_id += 1
+        notes[note_id] = text
+        self._write({"op": "add", "id": note_id, "text": text})
+        return note_id
+
+    def update(self, note_id, text):
+        """修改记事内容，内容没变时不写日志"""
+        notes = self._load()
+        if note_id not in notes or notes[note_id] == text:
+            return False
+        notes[note_id] = text
+        self._write({"op": "set", "id": note_id, "text": text})
+        self._maybe_compact()
+        return True
+
+    def delete(self, note_id):
+        notes = self._load()
+        if notes.pop(note_id, None) is None:
+            return False
+        self._write({"op": "del", "id": note_id})
+        self._maybe_compact()
+        return True
+
+    def delete_last(self):
+        """删除最后一条记事，返回其ID，没有记事时返回None"""
+        notes = self._load()
+        if not notes:
+            return None
+        note_id = next(reversed(notes))
+        self.delete(note_id)
+        return note_id
+
+    def migrate_from_config(self, config, section='CustomText'):
+        """把旧版 config.ini 中 content0..contentN 的记事导入日志
+
+        只在日志文件还不存在时导入，返回导入条数；调用方负责从配置中删除旧段。
+        """
+        if self.exists() or not config.has_section(section):
+            return 0
+        keys = [key for key in config.options(section)
+                if key.startswith('content') and key[7:].isdigit()]
+        keys.sort(key=lambda key: int(key[7:]))
+        self._notes = {}
+        for key in keys:
+            self.append(config.get(section, key, raw=True))
+        if not keys:
+            self._write_snapshot()
+        return len(keys)
+
+    def compact(self):
+        """把日志重写成只含当前记事的快照（临时文件 + 替换）"""
+        self._load()
+        self._write_snapshot()
+        self.compactions += 1
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    # ---------- 内部实现 ----------
+    def _load(self):
+        if self._notes is not None:
+            return self._notes
+        notes = {}
+        lines = 0
+        if self.exists():
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    self._needs_newline = not line.endswith("\n")
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # 崩溃时写了一半的行
+                    lines += 1
+                    op = record.get("op")
+                    note_id = record.get("id")
+                    if op == "add" or op == "set" and note_id in notes:
+                        notes[note_id] = record.get("text", "")
+                    elif op == "del":
+                        notes.pop(note_id, None)
+                    elif op == "meta":
+                        self._next_id = max(self._next_id, record.get("next_id", 1))
+                    if isinstance(note_id, int) and note_id >= self._next_id:
+                        self._next_id = note_id + 1
+        self._notes = notes
+        self._journal_lines = lines
+        return notes
+
+    def _write(self, record):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+            if self._needs_newline:
+                self._file.write("\n")
+                self._needs_newline = False
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._journal_lines += 1
+        self.appends += 1
+
+    def _maybe_compact(self):
+        limit = max(self.min_compact, self.compact_ratio * len(self._notes))
+        if self._journal_lines > limit:
+            self.compact()
+
+    def _write_snapshot(self):
+        self.close()
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"op": "meta", "next_id": self._next_id}) + "\n")
+            for note_id, text in self._notes.items():
+                f.write(json.dumps({"op": "add", "id": note_id, "text": text}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._needs_newline = False
+        self._journal_lines = len(self._notes) + 1
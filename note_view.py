@@ -0,0 +1,131 @@
+# note_view.py
+import tkinter as tk
+
+# --------------------------
+# 记事列表视图
+# --------------------------
+class NoteListView:
+    """虚拟化的记事列表：只为可见的行创建输入框
+
+    最多显示 rows 行，输入框放在池子里复用，滚动时只把新的记事内容换进去；
+    记事再多，控件数量和窗口重新布局的开销都不变。
+    记事内容始终以 NoteStore 为准，ids 是按顺序排列的记事ID。
+    on_change(note_id, text) 在记事内容被修改后调用，删除时 text 为None。
+    """
+
+    def __init__(self, parent, store, font, fg, rows=8):
+        self.parent = parent
+        self.store = store
+        self.font = font
+        self.fg = fg
+        self.rows = max(1, rows)
+        self.ids = []
+        self.top = 0          # 第一个可见行对应 ids 的下标
+        self.pool = []        # 复用的输入框
+        self.row_ids = []     # 每个可见行当前显示的记事ID
+        self.packed = 0       # 已显示的输入框数量
+        self.on_change = None
+
+    # ---------- 对外接口 ----------
+    def reload(self):
+        """从 NoteStore 重新读取记事，显示最后几行"""
+        self.ids = [note_id for note_id, _ in self.store]
+        self.row_ids = []
+        self.top = max(0, len(self.ids) - self.rows)
+        self._render()
+        if self.ids:
+            self.focus_row(self.visible_count() - 1)
+
+    def visible_count(self):
+        return min(self.rows, len(self.ids))
+
+    def add(self, text=""):
+        """末尾新增一条记事并聚焦，记事日志只追加一行"""
+        self.save()
+        self.ids.append(self.store.append(text))
+        self.top = max(0, len(self.ids) - self.rows)
+        self._render()
+        self.focus_row(self.visible_count() - 1)
+
+    def delete_last(self):
+        """删除最后一条记事，至少保留一条"""
+        if len(self.ids) <= 1:
+            return
+        self.save()
+        note_id = self.ids.pop()
+        self.store.delete(note_id)
+        if self.on_change:
+            self.on_change(note_id, None)
+        self.top = min(self.top, max(0, len(self.ids) - self.rows))
+        self._render()
+
+    def save(self):
+        """把可见行的内容写回 NoteStore（只写有变化的）"""
+        for row in range(len(self.row_ids)):
+            self._save_row(row)
+
+    def scroll(self, delta):
+        """上下滚动 delta 行"""
+        top = min(max(0, self.top + delta), max(0, len(self.ids) - self.rows))
+        if top != self.top:
+            self.save()
+            self.top = top
+            self._render()
+
+    def focus_row(self, row):
+        entry = self.pool[row]
+        entry.focus_set()
+        entry.icursor('end')
+
+    # ---------- 内部实现 ----------
+    def _entry(self, row):
+        """取第 row 个输入框，池子不够时才新建"""
+        while len(self.pool) <= row:
+            index = len(self.pool)
+            entry = tk.Entry(
+                self.parent,
+                bg='#1A1A1A',
+                fg=self.fg,
+                insertbackground="#B7B9B7",
+                font=self.font,
+                width=25,
+                highlightthickness=0,
+                relief='flat'
+            )
+            entry.bind('<Return>', lambda e: self.add())
+            entry.bind('<FocusOut>', lambda e, row=index: self._save_row(row))
+            entry.bind('<MouseWheel>', lambda e: self.scroll(-1 if e.delta > 0 else 1))
+            entry.bind('<Up>', lambda e, row=index: self._move_focus(row, -1))
+            entry.bind('<Down>', lambda e, row=index: self._move_focus(row, 1))
+            self.pool.append(entry)
+        return self.pool[row]
+
+    def _render(self):
+        """让可见行显示 ids[top:top+rows]，内容没变的行不动"""
+        row_ids = self.ids[self.top:self.top + self.visible_count()]
+        for row, note_id in enumerate(row_ids):
+            entry = self._entry(row)
+            if row >= self.packed:
+                entry.pack(fill='x', pady=2)
+            if row >= len(self.row_ids) or self.row_ids[row] != note_id:
+                entry.delete(0, 'end')
+                entry.insert(0, self.store.get(note_id, ""))
+        for row in range(len(row_ids), self.packed):
+            self.pool[row].pack_forget()
+        self.packed = len(row_ids)
+        self.row_ids = row_ids
+
+    def _save_row(self, row):
+        if row < len(self.row_ids):
+            note_id = self.row_ids[row]
+            text = self.pool[row].get()
+            if self.store.update(note_id, text) and self.on_change:
+                self.on_change(note_id, text)
+
+    def _move_focus(self, row, step):
+        """上下方向键换行，到边上时滚动"""
+        target = row + step
+        if 0 <= target < self.visible_count():
+            self.focus_row(target)
+        else:
+            self.scroll(step)
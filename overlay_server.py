@@ -0,0 +1,260 @@
+# overlay_server.py
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --------------------------
+# OBS 浏览器源页面
+# --------------------------
+OVERLAY_PAGE = """<!DOCTYPE html>
+<html lang="zh">
+<head>
+<meta charset="utf-8">
+<title>直播助手</title>
+<style>
+  body { margin: 0; background: transparent; color: #EBF3EB;
+         font: 28px "Microsoft YaHei", sans-serif; text-shadow: 0 0 4px #000; }
+  #timer, #lyric { color: #B4B4B4; }
+  .idle { color: #FF0000; }
+</style>
+</head>
+<body>
+<div id="track">连接中...</div>
+<div id="lyric"></div>
+<div id="timer">00:00:00</div>
+<script>
+  var timer = {running: false, elapsed: 0, since: 0};
+  function pad(n) { return (n < 10 ? "0" : "") + n; }
+  function render() {
+    var seconds = timer.elapsed;
+    if (timer.running) seconds += Math.max(0, Date.now() / 1000 - timer.since);
+    seconds = Math.floor(seconds);
+    document.getElementById("timer").textContent =
+      pad(Math.floor(seconds / 3600)) + ":" + pad(Math.floor(seconds % 3600 / 60)) + ":" + pad(seconds % 60);
+  }
+  var source = new EventSource("/events");
+  source.onmessage = function (event) {
+    var state = JSON.parse(event.data);
+    var track = document.getElementById("track");
+    track.textContent = state.track.text;
+    track.className = state.track.title ? "" : "idle";
+    document.getElementById("lyric").textContent = state.lyric;
+    timer = state.timer;
+    render();
+  };
+  // 计时在页面本地走秒，服务器只在开始/暂停/恢复时推送
+  setInterval(render, 250);
+</script>
+</body>
+</html>
+"""
+
+
+# --------------------------
+# 推送服务器
+# --------------------------
+class OverlayServer:
+    """本机 HTTP/SSE 服务器，把播放信息和计时状态推给 OBS 浏览器源
+
+        GET /        叠加层页面
+        GET /state   当前状态 JSON
+        GET /events  Server-Sent Events，连上先收到当前状态，之后只在状态变化时推送
+
+    update() 在Tk主线程调用，状态没变时直接返回；JSON 每次变化只序列化一次，
+    所有订阅者共用。每个订阅者一个线程，平时阻塞在条件变量上，不占CPU。
+    计时只推送 {running, elapsed, since}，由页面自己走秒，所以不会每秒推送。
+    """
+
+    def __init__(self, host='127.0.0.1', port=8765, heartbeat=15.0):
+        self.host = host
+        self.port = port
+        self.heartbeat = heartbeat
+        self.state = {
+            "track": {"label": "", "title": "", "artist": "", "text": ""},
+            "timer": {"running": False, "elapsed": 0.0, "since": 0.0},
+            "lyric": "",
+        }
+        self._version = 0
+        self._payload = self._serialize()
+        self._changed = threading.Condition()
+        self._closed = False
+        self._httpd = None
+        # 统计
+        self.clients = 0
+        self.pushes = 0
+
+    # ---------- 状态 ----------
+    def update_track(self, label, title, artist, text):
+        return self._update("track", {"label": label, "title": title, "artist": artist, "text": text})
+
+    def update_lyric(self, line):
+        return self._update("lyric", line)
+
+    def update_timer(self, running, elapsed):
+        """elapsed 为此刻已计时秒数，计时中时页面从 since 开始往上加"""
+        return self._update("timer", {"running": running, "elapsed": round(elapsed, 3),
+                                      "since": time.time() if running else 0.0})
+
+    def snapshot(self):
+        """返回 (版本号, JSON文本)"""
+        with self._changed:
+            return self._version, self._payload
+
+    def wait_change(self, version, timeout=None):
+        """等到版本号不同于 version 或超时；服务器关闭时返回 (version, None)"""
+        with self._changed:
+            self._changed.wait_for(lambda: self._version != version or self._closed, timeout)
+            if self._closed:
+                return version, None
+            return self._version, self._payload
+
+    def _update(self, key, value):
+        with self._changed:
+            if key == "timer" and self._same_timer(self.state[key], value):
+                return False
+            if self.state[key] == value:
+                return False
+            self.state[key] = value
+            self._version += 1
+            self._payload = self._serialize()
+            self._changed.notify_all()
+            return True
+
+    @staticmethod
+    def _same_timer(old, new):
+        # 计时中时 since 每次都不同，只要推算出的当前秒数一致就不算变化
+        if old["running"] != new["running"]:
+            return False
+        if not new["running"]:
+            return old["elapsed"] == new["elapsed"]
+        return abs((old["elapsed"] - old["since"]) - (new["elapsed"] - new["since"])) < 0.5
+
+    def _serialize(self):
+        return json.dumps(dict(self.state, version=self._version), ensure_ascii=False)
+
+    # ---------- 服务器 ----------
+    def start(self):
+        """在后台线程中开始监听，返回实际端口（port=0 时由系统分配）"""
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _OverlayHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.overlay = self
+        self.port = self._httpd.server_address[1]
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self.port
+
+    def stop(self):
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+
+class _OverlayHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        overlay = self.server.overlay
+        path = self.path.split("?", 1)[0]
+        if path == "/":
+            self._send(200, "text/html; charset=utf-8", OVERLAY_PAGE.encode('utf-8'))
+        elif path == "/state":
+            self._send(200, "application/json; charset=utf-8", overlay.snapshot()[1].encode('utf-8'))
+        elif path == "/events":
+            self._stream(overlay)
+        else:
+            self._send(404, "text/plain; charset=utf-8", b"not found")
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, overlay):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        overlay.clients += 1
+        try:
+            version, payload = overlay.snapshot()
+            self._event(version, payload)
+            while True:
+                new_version, payload = overlay.wait_change(version, overlay.heartbeat)
+                if payload is None:
+                    break
+                if new_version == version:
+                    self.wfile.write(b": ping\n\n")  # 心跳，顺便发现已断开的连接
+                else:
+                    version = new_version
+                    self._event(version, payload)
+                    overlay.pushes += 1
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+            pass
+        finally:
+            overlay.clients -= 1
+
+    def _event(self, version, payload):
+        self.wfile.write(f"id: {version}\ndata: {payload}\n\n".encode('utf-8'))
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass  # 不在控制台刷访问日志
+
+
+# --------------------------
+# 本地自测
+# --------------------------
+def read_event(response):
+    """从SSE响应中读出下一条 data 事件"""
+    data = None
+    while True:
+        line = response.readline().decode('utf-8').rstrip("\n")
+        if line.startswith("data: "):
+            data = line[6:]
+        elif line == "" and data is not None:
+            return json.loads(data)
+
+
+def self_test():
+    import http.client
+    server = OverlayServer(port=0, heartbeat=0.2)
+    port = server.start()
+    try:
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+        connection.request("GET", "/events")
+        events = connection.getresponse()
+        assert read_event(events)["version"] == 0
+
+        assert server.update_track("QQ音乐", "晴天", "周杰伦", "QQ音乐：晴天 - 周杰伦")
+        assert not server.update_track("QQ音乐", "晴天", "周杰伦", "QQ音乐：晴天 - 周杰伦")
+        assert server.update_timer(True, 12.0)
+        assert not server.update_timer(True, 12.0)  # 同一时刻重复上报不推送
+        # 订阅者醒来前连续发生的变化合并成一次推送
+        state = read_event(events)
+        assert state["track"]["title"] == "晴天" and state["timer"]["running"], state
+        assert state["version"] == 2, state
+
+        time.sleep(0.5)  # 期间只有心跳
+        assert server.pushes == 1, server.pushes
+        assert server.update_timer(False, 13.0)
+        assert read_event(events)["timer"] == {"running": False, "elapsed": 13.0, "since": 0.0}
+
+        plain = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+        plain.request("GET", "/state")
+        assert json.loads(plain.getresponse().read())["version"] == 3
+        plain.request("GET", "/")
+        assert b"EventSource" in plain.getresponse().read()
+        connection.close()
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    self_test()
+    print("自测通过")
@@ -0,0 +1,133 @@
+# pomodoro.py
+import random
+import time
+
+# --------------------------
+# 番茄钟模块
+# --------------------------
+class PomodoroTimer:
+    """正计时番茄钟
+
+    使用单调时钟计时，系统时间被NTP或手动修改也不影响；每次唤醒都对齐到
+    下一个整秒，显示值只在变化时才回调 on_display，不会出现跳两秒。
+    clock 可注入，配合 scheduler.SimulatedClock 可以快进测试。
+    on_change 在启动、暂停、恢复后调用（如记入时间线）。
+    """
+
+    JOB_NAME = 'pomodoro'
+    TICK_TOLERANCE = 0.001  # 浮点误差容忍：离整秒不到1毫秒视为已到
+
+    def __init__(self, scheduler, on_display, clock=time.monotonic, on_change=None):
+        self.scheduler = scheduler
+        self.on_display = on_display
+        self.clock = clock
+        self.on_change = on_change
+        self.is_running = False
+        self.start_time = 0
+        self.total_seconds = 0
+        self.paused_time = 0
+        self.paused_by_external = False  # 新增：标记是否因外部原因（如B站）暂停
+        self._shown = None
+        self.redraws = 0
+
+    def start(self):
+        """启动番茄钟"""
+        if not self.is_running:
+            self.is_running = True
+            self.start_time = self.clock() - self.paused_time
+            self._schedule_update()
+            self._changed()
+
+    def restore(self, elapsed):
+        """接着上次会话的已计时秒数（在 start() 之前调用），先显示出来"""
+        if not self.is_running:
+            self.paused_time = max(0.0, elapsed)
+            self._show(self.paused_time)
+
+    def _changed(self):
+        if self.on_change:
+            self.on_change()
+
+    def _schedule_update(self):
+        """立即刷新一次，之后每秒在整秒边界唤醒"""
+        elapsed = self.clock() - self.start_time
+        self._show(elapsed)
+        self.scheduler.add_job(
+            self.JOB_NAME, self._tick, 1.0,
+            delay=1.0 - elapsed % 1.0, flexible=False
+        )
+
+    def _tick(self):
+        if self.is_running:
+            self._show(self.clock() - self.start_time)
+
+    def _show(self, elapsed):
+        seconds = int(elapsed + self.TICK_TOLERANCE)
+        self.total_seconds = seconds
+        if seconds != self._shown:
+            self._shown = seconds
+            self.redraws += 1
+            self.on_display(seconds)
+
+    def pause_or_resume(self, is_external=False):
+        if self.is_running:
+            # 暂停逻辑
+            self.is_running = False
+            self.paused_time = self.clock() - self.start_time
+            self.paused_by_external = is_external
+            self.scheduler.remove_job(self.JOB_NAME)
+        else:
+            # 恢复逻辑
+            self.is_running = True
+            self.start_time = self.clock() - self.paused_time
+            self.paused_by_external = False
+            self._schedule_update()
+        self._changed()
+
+    def get_elapsed_time(self):
+        if self.is_running:
+            return self.clock() - self.start_time
+        return self.paused_time
+
+
+# --------------------------
+# 模拟测试
+# --------------------------
+def simulate(hours=8, seed=1, jitter=0.02):
+    """用模拟时钟快进 hours 小时，随机暂停/恢复，检查显示值逐秒递增且计时无漂移"""
+    from scheduler import SimulatedClock, TickScheduler
+
+    clock = SimulatedClock(jitter=jitter, seed=seed)
+    scheduler = TickScheduler(clock.after, clock.after_cancel, clock=clock)
+    shown = []
+    timer = PomodoroTimer(scheduler, shown.append, clock=clock)
+    rng = random.Random(seed)
+
+    timer.start()
+    focus = 0.0
+    toggles = 0
+    while clock.now < hours * 3600:
+        step = rng.uniform(0.05, 900)
+        if timer.is_running:
+            focus += step
+        clock.advance(step)
+        timer.pause_or_resume()
+        toggles += 1
+
+    assert shown == list(range(len(shown))), "显示值出现跳秒或重复"
+    drift = timer.get_elapsed_time() - focus
+    assert abs(drift) < 1e-6, f"计时漂移 {drift}s"
+    return {
+        "simulated_hours": hours,
+        "toggles": toggles,
+        "focus_seconds": int(focus),
+        "redraws": timer.redraws,
+        "wakeups": scheduler.wakeups,
+        "drift": drift,
+    }
+
+
+if __name__ == "__main__":
+    for seed in range(5):
+        print(simulate(seed=seed))
+    print("模拟通过")
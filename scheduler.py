@@ -0,0 +1,254 @@
+# scheduler.py
+import heapq
+import random
+import time
+from collections import deque
+
+# --------------------------
+# 统一调度器
+# --------------------------
+class TickJob:
+    """一个周期任务
+
+    callback 返回 True 表示输出有变化（周期恢复到 min_period），
+    返回 False 表示输出稳定（连续 stable_after 次稳定后周期乘以 backoff，最多到 max_period），
+    返回 None 表示不参与自适应。flexible 的任务可以被提前合并到别的任务的唤醒里执行。
+    """
+
+    def __init__(self, name, callback, period, min_period=None, max_period=None,
+                 backoff=2.0, stable_after=5, flexible=True):
+        self.name = name
+        self.callback = callback
+        self.min_period = min_period if min_period is not None else period
+        self.max_period = max_period if max_period is not None else period
+        self.period = period
+        self.backoff = backoff
+        self.stable_after = stable_after
+        self.flexible = flexible
+        self.deadline = 0.0
+        self.stable_runs = 0
+        self.runs = 0
+
+
+class TickScheduler:
+    """所有周期任务共用一个 after：按截止时间放进堆里，只为最早的截止时间挂一个定时器
+
+    flexible 任务排下一次时，如果半个周期内已有别的任务要唤醒，就直接对齐到那次唤醒；
+    唤醒时还会顺带执行 merge_window 秒内即将到期的 flexible 任务。
+    这样同一时刻到期的任务合并成一次唤醒。
+    after/after_cancel/clock 可替换，测试时传入模拟实现即可。
+    lag_listener 不为 None 时，每次唤醒都会收到实际唤醒时间比计划晚了多少秒（事件循环延迟）。
+    """
+
+    def __init__(self, after, after_cancel, clock=time.monotonic, merge_window=0.1):
+        self._after = after
+        self._after_cancel = after_cancel
+        self.clock = clock
+        self.merge_window = merge_window
+        self.jobs = {}
+        self._heap = []  # (deadline, 序号, job)，过期条目在弹出时跳过
+        self._seq = 0
+        self._after_id = None
+        self._armed_deadline = None
+        self._wakeup_times = deque()
+        self.wakeups = 0
+        self.lag_listener = None
+
+    # ---------- 任务管理 ----------
+    def add_job(self, name, callback, period, delay=None, **options):
+        """添加周期任务，delay 为首次执行的延迟（默认一个周期）"""
+        job = TickJob(name, callback, period, **options)
+        self.remove_job(name)
+        self.jobs[name] = job
+        deadline = self.clock() + (period if delay is None else delay)
+        self._push(job, self._align(job, deadline) if job.flexible else deadline)
+        self._arm()
+        return job
+
+    def remove_job(self, name):
+        """移除任务，堆里的旧条目会在弹出时被忽略"""
+        job = self.jobs.pop(name, None)
+        if job is not None:
+            job.deadline = None
+            self._arm()
+        return job
+
+    def run_soon(self, name, delay=0.0):
+        """让任务尽快执行（如窗口事件、手动刷新）"""
+        job = self.jobs.get(name)
+        if job is not None:
+            deadline = self.clock() + delay
+            if deadline < job.deadline:
+                self._push(job, deadline)
+                self._arm()
+
+    def report(self, name, changed):
+        """反馈任务输出是否变化，用于异步产出结果的任务（如后台监控）"""
+        job = self.jobs.get(name)
+        if job is not None:
+            self._adapt(job, changed)
+
+    # ---------- 统计 ----------
+    def wakeups_per_minute(self):
+        """最近60秒内的唤醒次数"""
+        self._trim_wakeups(self.clock())
+        return len(self._wakeup_times)
+
+    def stats(self):
+        return {
+            "wakeups": self.wakeups,
+            "wakeups_per_minute": self.wakeups_per_minute(),
+            "periods": {name: job.period for name, job in self.jobs.items()},
+        }
+
+    # ---------- 内部实现 ----------
+    def _push(self, job, deadline):
+        job.deadline = deadline
+        self._seq += 1
+        heapq.heappush(self._heap, (deadline, self._seq, job))
+
+    def _peek(self):
+        """返回最早的有效条目，顺便清掉过期条目"""
+        heap = self._heap
+        while heap:
+            deadline, _, job = heap[0]
+            if self.jobs.get(job.name) is job and job.deadline == deadline:
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def _arm(self):
+        """保证只挂一个 after，对应最早的截止时间"""
+        head = self._peek()
+        deadline = head[0] if head else None
+        if deadline == self._armed_deadline and self._after_id is not None:
+            return
+        if self._after_id is not None:
+            self._after_cancel(self._after_id)
+            self._after_id = None
+        self._armed_deadline = deadline
+        if deadline is not None:
+            delay_ms = max(0, int((deadline - self.clock()) * 1000 + 0.999))
+            self._after_id = self._after(delay_ms, self._wakeup)
+
+    def _wakeup(self):
+        planned = self._armed_deadline
+        self._after_id = None
+        self._armed_deadline = None
+        now = self.clock()
+        if self.lag_listener is not None and planned is not None:
+            self.lag_listener(now - planned)
+        self.wakeups += 1
+        self._wakeup_times.append(now)
+        self._trim_wakeups(now)
+
+        limit = now + self.merge_window
+        due = []
+        keep = []
+        while True:
+            head = self._peek()
+            if head is None or head[0] > limit:
+                break
+            heapq.heappop(self._heap)
+            # 未到期的任务只有 flexible 的才提前合并执行；after 只精确到毫秒，
+            # 差不到1毫秒的也算到期，否则会以 after(0) 反复空转
+            (due if head[0] <= now + 0.001 or head[2].flexible else keep).append(head)
+        for entry in keep:
+            heapq.heappush(self._heap, entry)
+
+        for deadline, _, job in due:
+            if self.jobs.get(job.name) is not job:
+                continue
+            # 先排好下一次，回调里可以再调整（如 remove_job / run_soon）
+            # flexible 任务从本次执行时刻重新计周期，这样被合并后就和其他任务对齐；
+            # 其他任务按原截止时间累加，不会漂移
+            next_deadline = deadline + job.period
+            if job.flexible:
+                next_deadline = self._align(job, now + job.period)
+            elif next_deadline <= now:
+                next_deadline = now + job.period
+            self._push(job, next_deadline)
+            job.runs += 1
+            try:
+                changed = job.callback()
+            except Exception as e:
+                print(f"[ERROR] 定时任务 {job.name} 失败: {str(e)}")
+                changed = None
+            if changed is not None:
+                self._adapt(job, changed)
+        self._arm()
+
+    def _align(self, job, deadline):
+        """在 [deadline - 半个周期, deadline + merge_window] 内找别的任务的唤醒时刻对齐"""
+        earliest = max(self.clock(), deadline - job.period / 2)
+        latest = deadline + self.merge_window
+        best = None
+        for other in self.jobs.values():
+            other_deadline = other.deadline
+            if other is job or other_deadline is None or not earliest < other_deadline <= latest:
+                continue
+            if best is None or abs(other_deadline - deadline) < abs(best - deadline):
+                best = other_deadline
+        return deadline if best is None else best
+
+    def _adapt(self, job, changed):
+        if changed:
+            job.stable_runs = 0
+            if job.period != job.min_period:
+                job.period = job.min_period
+                self.run_soon(job.name, job.period)
+        else:
+            job.stable_runs += 1
+            if job.stable_runs >= job.stable_after and job.period < job.max_period:
+                job.stable_runs = 0
+                job.period = min(job.max_period, job.period * job.backoff)
+
+    def _trim_wakeups(self, now):
+        while self._wakeup_times and now - self._wakeup_times[0] > 60:
+            self._wakeup_times.popleft()
+
+
+# --------------------------
+# 模拟时钟
+# --------------------------
+class SimulatedClock:
+    """模拟时钟，同时提供 after/after_cancel，用于在没有Tk的情况下快进测试
+
+    jitter 为定时器随机推迟的最大秒数，模拟Tk事件循环的唤醒延迟。
+    """
+
+    def __init__(self, start=0.0, jitter=0.0, seed=None):
+        self.now = start
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._timers = []
+        self._cancelled = set()
+        self._seq = 0
+
+    def __call__(self):
+        return self.now
+
+    def after(self, ms, callback):
+        self._seq += 1
+        delay = ms / 1000 + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        heapq.heappush(self._timers, (self.now + delay, self._seq, callback))
+        return self._seq
+
+    def after_cancel(self, timer_id):
+        self._cancelled.add(timer_id)
+
+    def pending(self):
+        """尚未触发的定时器数量"""
+        return sum(1 for _, seq, _ in self._timers if seq not in self._cancelled)
+
+    def advance(self, seconds):
+        """把时间拨快 seconds 秒，依次触发期间到期的定时器"""
+        target = self.now + seconds
+        while self._timers and self._timers[0][0] <= target:
+            deadline, seq, callback = heapq.heappop(self._timers)
+            if seq in self._cancelled:
+                self._cancelled.discard(seq)
+                continue
+            self.now = max(self.now, deadline)
+            callback()
+        self.now = target
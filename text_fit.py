@@ -0,0 +1,68 @@
+# text_fit.py
+from collections import OrderedDict
+
+ELLIPSIS = "…"
+
+
+# --------------------------
+# 文字宽度缓存与截断
+# --------------------------
+class TextFitter:
+    """按字符缓存 font.measure 的结果，把文字截断到给定像素宽度（末尾加省略号）
+
+    每个字符只向Tk量一次宽度，之后整行宽度是查表求和；歌名里反复出现的字很快全部命中。
+    截断结果按 (文字, 宽度) 再缓存 cache_size 条，同一首歌反复显示时不用重算。
+    字体改变后调用 reset()。font 只需要有 measure(text) 方法，测试时可以传假字体。
+    """
+
+    def __init__(self, font, cache_size=64):
+        self.font = font
+        self.cache_size = cache_size
+        self._widths = {}
+        self._fits = OrderedDict()
+        # 统计
+        self.measures = 0
+        self.hits = 0  # 截断结果缓存命中次数
+
+    def reset(self):
+        self._widths.clear()
+        self._fits.clear()
+
+    def char_width(self, char):
+        width = self._widths.get(char)
+        if width is None:
+            self.measures += 1
+            width = self._widths[char] = self.font.measure(char)
+        return width
+
+    def measure(self, text):
+        return sum(map(self.char_width, text))
+
+    def fit(self, text, width):
+        """返回不超过 width 像素的文字，放不下时截断并以省略号结尾；width <= 0 表示不限"""
+        if width <= 0:
+            return text
+        key = (text, width)
+        fitted = self._fits.get(key)
+        if fitted is not None:
+            self.hits += 1
+            self._fits.move_to_end(key)
+            return fitted
+        fitted = self._truncate(text, width)
+        self._fits[key] = fitted
+        if len(self._fits) > self.cache_size:
+            self._fits.popitem(last=False)
+        return fitted
+
+    def _truncate(self, text, width):
+        widths = [self.char_width(char) for char in text]
+        if sum(widths) <= width:
+            return text
+        budget = width - self.char_width(ELLIPSIS)
+        used = 0
+        index = 0
+        for index, char_width in enumerate(widths):
+            if used + char_width > budget:
+                break
+            used += char_width
+        return text[:index].rstrip() + ELLIPSIS
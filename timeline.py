@@ -0,0 +1,161 @@
+# timeline.py
+import os
+import time
+from collections import namedtuple
+from datetime import date, datetime
+
+# --------------------------
+# 记录类型
+# --------------------------
+# 曲目变化（title 为空表示停止播放）
+TrackRecord = namedtuple('TrackRecord', ['ts', 'label', 'title', 'artist'])
+# 计时状态区间：state 为 focus（计时中）/ pause（手动暂停）/ auto（摸鱼自动暂停，detail 为应用名）
+# continued 为 True 表示同一区间在 flush 时切开后的后续片段（统计时不再算一次中断）
+IntervalRecord = namedtuple('IntervalRecord', ['start', 'end', 'state', 'detail', 'continued'],
+                            defaults=(False,))
+
+STATE_FOCUS = "focus"
+STATE_PAUSE = "pause"
+STATE_AUTO = "auto"
+
+
+def _clean(text):
+    return text.replace("\t", " ").replace("\n", " ").replace("\r", " ")
+
+
+def _day_of(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
+
+
+# --------------------------
+# 记录器
+# --------------------------
+class TimelineRecorder:
+    """会话时间线记录器：曲目变化和计时状态区间
+
+    tick 路径上只往内存缓冲区追加一个元组（约1微秒），格式化和写盘在 flush() 中完成。
+    文件按天分段追加写入 directory/YYYY-MM-DD.tsv，每行一条制表符分隔的记录：
+        T  时间戳  标签  歌名  歌手
+        I  开始    结束  状态  详情  [c]
+    flush() 时尚未结束的区间也会截止到当前时间写出一段，之后的片段末尾带 c 标记，
+    这样长时间不切换状态、或者程序被强制结束时，已经过去的时间也不会丢。
+    listeners 会在每个区间（片段）结束时被调用（如增量统计）。
+    """
+
+    def __init__(self, directory, clock=time.time):
+        self.directory = directory
+        self.clock = clock
+        self.listeners = []
+        self._buffer = []
+        self._state = None
+        self._state_since = None
+        self._state_detail = ""
+        self._state_continued = False
+        # 统计
+        self.recorded = 0
+        self.flushed = 0
+
+    def track(self, label, title, artist):
+        """记录曲目变化"""
+        self._buffer.append(TrackRecord(self.clock(), label, title, artist))
+        self.recorded += 1
+
+    def state(self, state, detail=""):
+        """切换计时状态，同时结束上一个区间；state 为 None 表示会话结束"""
+        now = self.clock()
+        self._close_interval(now)
+        self._state = state
+        self._state_since = now
+        self._state_detail = detail
+        self._state_continued = False
+
+    def _close_interval(self, now):
+        if self._state is None:
+            return
+        record = IntervalRecord(self._state_since, now, self._state, self._state_detail,
+                                self._state_continued)
+        self._buffer.append(record)
+        self.recorded += 1
+        for listener in self.listeners:
+            listener(record)
+
+    def open_interval(self):
+        """当前尚未结束的区间（截止到现在），没有时返回None"""
+        if self._state is None:
+            return None
+        return IntervalRecord(self._state_since, self.clock(), self._state, self._state_detail,
+                              self._state_continued)
+
+    def flush(self):
+        """把缓冲区按天追加写入文件，当前区间截止到现在写出一段后继续"""
+        now = self.clock()
+        if self._state is not None and now > self._state_since:
+            self._close_interval(now)
+            self._state_since = now
+            self._state_continued = True
+        if not self._buffer:
+            return 0
+        buffer, self._buffer = self._buffer, []
+        by_day = {}
+        for record in buffer:
+            if isinstance(record, TrackRecord):
+                line = f"T\t{record.ts:.1f}\t{_clean(record.label)}\t{_clean(record.title)}\t{_clean(record.artist)}\n"
+                ts = record.ts
+            else:
+                mark = "\tc" if record.continued else ""
+                line = f"I\t{record.start:.1f}\t{record.end:.1f}\t{record.state}\t{_clean(record.detail)}{mark}\n"
+                ts = record.start
+            by_day.setdefault(_day_of(ts), []).append(line)
+
+        os.makedirs(self.directory, exist_ok=True)
+        for day, lines in by_day.items():
+            with open(os.path.join(self.directory, f"{day}.tsv"), 'a', encoding='utf-8') as f:
+                f.writelines(lines)
+        self.flushed += len(buffer)
+        return len(buffer)
+
+    def close(self):
+        """结束当前区间并写盘"""
+        self.state(None)
+        self.flush()
+
+
+# --------------------------
+# 读取
+# --------------------------
+def list_days(directory):
+    """返回已有记录的日期（date），按时间排序"""
+    if not os.path.isdir(directory):
+        return []
+    days = []
+    for name in os.listdir(directory):
+        if name.endswith(".tsv"):
+            try:
+                days.append(date.fromisoformat(name[:-4]))
+            except ValueError:
+                continue
+    return sorted(days)
+
+
+def iter_records(directory, start=None, end=None):
+    """逐行流式读取 [start, end] 日期范围内的记录（date，含两端），不会一次载入全部"""
+    for day in list_days(directory):
+        if start is not None and day < start or end is not None and day > end:
+            continue
+        with open(os.path.join(directory, f"{day.isoformat()}.tsv"), encoding='utf-8') as f:
+            for line in f:
+                fields = line.rstrip("\n").split("\t")
+                try:
+                    if fields[0] == "T" and len(fields) == 5:
+                        yield TrackRecord(float(fields[1]), fields[2], fields[3], fields[4])
+                    elif fields[0] == "I" and len(fields) in (5, 6):
+                        yield IntervalRecord(float(fields[1]), float(fields[2]), fields[3], fields[4],
+                                             fields[5:] == ["c"])
+                except ValueError:
+                    continue  # 崩溃时写了一半的行
+
+
+def iter_day(directory, day):
+    """读取某一天的记录"""
+    return iter_records(directory, day, day)
+
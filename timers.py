@@ -0,0 +1,354 @@
+# timers.py
+import heapq
+import json
+import os
+import re
+import time
+
+# --------------------------
+# 定时器类型
+# --------------------------
+KIND_COUNTDOWN = "countdown"  # 倒计时
+KIND_REMINDER = "reminder"    # 记事提醒，绑定一条记事
+KIND_CYCLE = "cycle"          # 番茄工作/休息循环
+
+PHASE_WORK = "work"
+PHASE_BREAK = "break"
+PHASE_LONG_BREAK = "long_break"
+
+# 记事末尾的提醒写法：@25、@25m、@25分钟、@1.5h、@90s
+REMINDER_SUFFIX = re.compile(r"\s*@(\d+(?:\.\d+)?)\s*(s|秒|m|min|分|分钟|h|小时)?\s*$", re.IGNORECASE)
+UNIT_SECONDS = {"s": 1, "秒": 1, "m": 60, "min": 60, "分": 60, "分钟": 60, "h": 3600, "小时": 3600}
+
+
+def parse_reminder(text):
+    """从记事文字中拆出提醒，返回 (提醒内容, 秒数)，没有写提醒时返回None"""
+    match = REMINDER_SUFFIX.search(text)
+    if not match:
+        return None
+    seconds = float(match.group(1)) * UNIT_SECONDS[(match.group(2) or "m").lower()]
+    label = text[:match.start()].strip()
+    return (label, seconds) if label and seconds > 0 else None
+
+
+class Timer:
+    """一个待触发的定时器，due 为触发时刻（与引擎的 clock 同一时基）"""
+
+    FIELDS = ('id', 'kind', 'label', 'due', 'note_id', 'phase', 'round', 'durations', 'seconds')
+
+    def __init__(self, id, kind, label, due, note_id=None, phase=None, round=0, durations=None,
+                 seconds=None):
+        self.id = id
+        self.kind = kind
+        self.label = label
+        self.due = due
+        self.note_id = note_id
+        self.seconds = seconds    # 记事提醒设置的时长（秒）
+        self.phase = phase
+        self.round = round        # 循环中已完成的工作段数
+        self.durations = durations  # 循环各阶段时长（秒）及长休息间隔
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{field: data.get(field) for field in cls.FIELDS})
+
+
+# --------------------------
+# 定时器引擎
+# --------------------------
+class TimerEngine:
+    """所有倒计时、记事提醒和番茄循环共用一个堆
+
+    只在调度器里挂一个 timers 任务，对准堆顶最早的截止时间，定时器再多也只有一个Tk after；
+    堆里的过期条目（取消或改期的）在弹出时跳过。
+    每次增删或触发都把待触发的定时器原子写入 path，重启后继续计时，
+    关闭期间已经到期的在启动后立即触发。
+    clock 必须是墙上时间（默认 time.time），测试时传入 scheduler.SimulatedClock。
+    on_fire(timer, phase) 在触发时调用，phase 为循环刚结束的阶段（其他类型为None）。
+    """
+
+    JOB_NAME = 'timers'
+
+    def __init__(self, scheduler, path=None, clock=time.time, on_fire=None):
+        self.scheduler = scheduler
+        self.path = path
+        self.clock = clock
+        self.on_fire = on_fire
+        self.timers = {}
+        self.fired_notes = {}  # 记事ID -> 已经触发过的提醒时长，同样的提醒不再设置
+        self._heap = []
+        self._seq = 0
+        self._next_id = 1
+        self._armed_due = None
+        # 统计
+        self.fired = 0
+        if path and os.path.exists(path):
+            self._load()
+        self._arm()
+
+    # ---------- 添加与取消 ----------
+    def add_countdown(self, seconds, label="倒计时"):
+        return self._add(Timer(self._new_id(), KIND_COUNTDOWN, label, self.clock() + seconds))
+
+    def add_reminder(self, note_id, seconds, label):
+        """给记事加提醒，同一条记事只保留最新的一个"""
+        self.cancel_note(note_id, save=False)
+        return self._add(Timer(self._new_id(), KIND_REMINDER, label, self.clock() + seconds,
+                               note_id=note_id, seconds=seconds))
+
+    def set_reminder(self, note_id, seconds, label):
+        """编辑记事时调用：时长没变只更新提醒文字，不重新计时；同样时长的提醒已经触发过就不再设置
+
+        返回生效的定时器，已触发过时返回None。
+        """
+        timer = self.reminder_for(note_id)
+        if timer is not None and timer.seconds == seconds:
+            if timer.label != label:
+                timer.label = label
+                self._save()
+            return timer
+        if timer is None and self.fired_notes.get(note_id) == seconds:
+            return None
+        return self.add_reminder(note_id, seconds, label)
+
+    def start_cycle(self, work=25 * 60, short_break=5 * 60, long_break=15 * 60, long_every=4):
+        """开始番茄循环（工作 → 短休息，每 long_every 个工作段后长休息），同时只有一个循环"""
+        self.stop_cycle(save=False)
+        durations = {PHASE_WORK: work, PHASE_BREAK: short_break,
+                     PHASE_LONG_BREAK: long_break, "long_every": long_every}
+        return self._add(Timer(self._new_id(), KIND_CYCLE, "番茄循环", self.clock() + work,
+                               phase=PHASE_WORK, durations=durations))
+
+    def cancel(self, timer_id, save=True):
+        timer = self.timers.pop(timer_id, None)
+        if timer is not None and save:
+            self._changed()
+        return timer
+
+    def cancel_note(self, note_id, save=True):
+        """取消某条记事的提醒（也忘掉它触发过的提醒，之后重新写上会再次设置）"""
+        found = [timer.id for timer in self.timers.values()
+                 if timer.kind == KIND_REMINDER and timer.note_id == note_id]
+        for timer_id in found:
+            self.cancel(timer_id, save=False)
+        forgot = self.fired_notes.pop(note_id, None) is not None
+        if (found or forgot) and save:
+            self._changed()
+        return bool(found)
+
+    def stop_cycle(self, save=True):
+        cycle = self.cycle()
+        if cycle is not None:
+            self.cancel(cycle.id, save)
+        return cycle
+
+    # ---------- 查询 ----------
+    def cycle(self):
+        for timer in self.timers.values():
+            if timer.kind == KIND_CYCLE:
+                return timer
+        return None
+
+    def reminder_for(self, note_id):
+        for timer in self.timers.values():
+            if timer.kind == KIND_REMINDER and timer.note_id == note_id:
+                return timer
+        return None
+
+    def pending(self):
+        """按触发时间排序的定时器"""
+        return sorted(self.timers.values(), key=lambda timer: timer.due)
+
+    def remaining(self, timer):
+        return max(0.0, timer.due - self.clock())
+
+    # ---------- 内部实现 ----------
+    def _new_id(self):
+        timer_id = self._next_id
+        self._next_id += 1
+        return timer_id
+
+    def _add(self, timer):
+        self.timers[timer.id] = timer
+        self._push(timer)
+        self._changed()
+        return timer
+
+    def _push(self, timer):
+        self._seq += 1
+        heapq.heappush(self._heap, (timer.due, self._seq, timer.id))
+
+    def _peek(self):
+        heap = self._heap
+        while heap:
+            due, _, timer_id = heap[0]
+            timer = self.timers.get(timer_id)
+            if timer is not None and timer.due == due:
+                return timer
+            heapq.heappop(heap)
+        return None
+
+    def _changed(self):
+        self._save()
+        self._arm()
+
+    def _arm(self):
+        """让调度器的 timers 任务对准最早的截止时间"""
+        head = self._peek()
+        due = head.due if head else None
+        if due == self._armed_due and (due is None) == (self.JOB_NAME not in self.scheduler.jobs):
+            return
+        self._armed_due = due
+        if due is None:
+            self.scheduler.remove_job(self.JOB_NAME)
+        else:
+            delay = max(0.0, due - self.clock())
+            # 周期只是兜底，每次触发后都会按新的堆顶重新排
+            self.scheduler.add_job(self.JOB_NAME, self._fire_due, max(delay, 1.0),
+                                   delay=delay, flexible=False)
+
+    def _fire_due(self):
+        now = self.clock()
+        fired = False
+        while True:
+            timer = self._peek()
+            if timer is None or timer.due > now + 0.001:
+                break
+            heapq.heappop(self._heap)
+            fired = True
+            self.fired += 1
+            phase = None
+            if timer.kind == KIND_CYCLE:
+                phase = timer.phase
+                self._advance(timer, now)
+                self._push(timer)
+            else:
+                del self.timers[timer.id]
+                if timer.kind == KIND_REMINDER:
+                    self.fired_notes[timer.note_id] = timer.seconds
+            if self.on_fire:
+                try:
+                    self.on_fire(timer, phase)
+                except Exception as e:
+                    print(f"[ERROR] 定时器回调失败: {str(e)}")
+        self._armed_due = None
+        if fired:
+            self._save()
+        self._arm()
+
+    @staticmethod
+    def _advance(timer, now):
+        """循环进入下一阶段；错过太久（如程序关着）时从现在重新计"""
+        durations = timer.durations
+        if timer.phase == PHASE_WORK:
+            timer.round += 1
+            long_every = durations.get("long_every") or 0
+            timer.phase = PHASE_LONG_BREAK if long_every and timer.round % long_every == 0 else PHASE_BREAK
+        else:
+            timer.phase = PHASE_WORK
+        length = durations[timer.phase]
+        base = timer.due if now - timer.due < length else now
+        timer.due = base + length
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"next_id": self._next_id,
+                       "timers": [timer.to_dict() for timer in self.pending()],
+                       "fired_notes": [[note_id, seconds] for note_id, seconds in self.fired_notes.items()]},
+                      f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            timers = [Timer.from_dict(item) for item in data.get("timers", [])]
+            fired_notes = {note_id: seconds for note_id, seconds in data.get("fired_notes", [])}
+        except (OSError, ValueError, TypeError) as e:
+            print(f"[ERROR] 读取定时器失败: {str(e)}")
+            return
+        self.fired_notes = fired_notes
+        for timer in timers:
+            self.timers[timer.id] = timer
+            self._push(timer)
+        self._next_id = max([data.get("next_id", 1)] + [timer.id + 1 for timer in timers])
+
+
+# --------------------------
+# 模拟测试
+# --------------------------
+def simulate(seed=1, reminders=200, hours=4):
+    import random
+    import tempfile
+    from scheduler import TickScheduler, SimulatedClock
+
+    rng = random.Random(seed)
+    path = os.path.join(tempfile.mkdtemp(), "timers.json")
+    clock = SimulatedClock(start=1_000_000.0, jitter=0.02, seed=seed)
+    scheduler = TickScheduler(clock.after, clock.after_cancel, clock=clock)
+    fired = []
+
+    def on_fire(timer, phase):
+        fired.append((clock(), timer.kind, timer.label, phase, timer.due))
+
+    engine = TimerEngine(scheduler, path, clock=clock, on_fire=on_fire)
+    expected = {}
+    delays = {}
+    for note_id in range(reminders):
+        delay = delays[note_id] = rng.uniform(1, hours * 1800)
+        engine.add_reminder(note_id, delay, f"记事{note_id}")
+        expected[f"记事{note_id}"] = clock() + delay
+    engine.add_countdown(600, "倒计时")
+    engine.start_cycle(work=1500, short_break=300, long_break=900, long_every=4)
+    # 定时器再多，调度器里也只有一个 after
+    assert clock.pending() == 1, clock.pending()
+
+    # 前一半时间之后 “重启”：新引擎从文件恢复
+    clock.advance(hours * 1800)
+    before_restart = len(fired)
+    engine = TimerEngine(scheduler, path, clock=clock, on_fire=on_fire)
+    assert clock.pending() == 1
+    clock.advance(hours * 1800)
+
+    reminder_fires = {label: at for at, kind, label, _, _ in fired if kind == KIND_REMINDER}
+    assert set(reminder_fires) == set(expected), len(reminder_fires)
+    for label, at in reminder_fires.items():
+        # 只会因为Tk唤醒延迟晚一点，不会提前
+        assert 0 <= at - expected[label] < 0.05, (label, at - expected[label])
+    phases = [phase for _, kind, _, phase, _ in fired if kind == KIND_CYCLE]
+    assert phases[:8] == [PHASE_WORK, PHASE_BREAK] * 3 + [PHASE_WORK, PHASE_LONG_BREAK], phases[:8]
+    assert any(kind == KIND_COUNTDOWN for _, kind, _, _, _ in fired)
+    assert before_restart < len(fired)
+    assert len(engine.timers) == 1 and engine.cycle() is not None
+
+    # 编辑记事：时长不变不重新计时，已经触发过的提醒改文字也不会再来
+    reminder = engine.set_reminder(-1, 600, "改错字之前")
+    due = reminder.due
+    clock.advance(300)
+    assert engine.set_reminder(-1, 600, "改错字之后") is reminder and reminder.due == due
+    assert reminder.label == "改错字之后"
+    clock.advance(301)
+    reminders_fired = lambda: sum(1 for _, kind, _, _, _ in fired if kind == KIND_REMINDER)
+    count = reminders_fired()
+    assert engine.set_reminder(-1, 600, "又改了一次") is None and engine.reminder_for(-1) is None
+    # 触发过的提醒写在文件里，重启后编辑记事也不会再来
+    engine = TimerEngine(scheduler, path, clock=clock, on_fire=on_fire)
+    assert engine.set_reminder(0, delays[0], "记事0") is None
+    assert engine.set_reminder(-1, 900, "改了时长") is not None  # 时长变了算新提醒
+    engine.cancel_note(-1)
+    clock.advance(1000)
+    assert reminders_fired() == count
+    return len(fired)
+
+
+if __name__ == "__main__":
+    for seed in range(3):
+        print(f"seed {seed}: 触发 {simulate(seed)} 次")
+    print(f"提醒解析: {parse_reminder('复习嵌入式系统 @25分钟')}")
+    print("模拟通过")
@@ -0,0 +1,48 @@
+# track_parser.py
+from functools import lru_cache
+
+# --------------------------
+# 播放标题解析
+# --------------------------
+# 歌名与歌手之间的分隔符：破折号、短破折号、连字符、全角连字符
+DASHES = "—–-－"
+
+
+def _split_once(text):
+    """在第一个分隔符处拆成 (歌名, 歌手)，歌名至少一个字符，拆不出时返回None"""
+    cut = -1
+    for dash in DASHES:
+        idx = text.find(dash, 1)
+        if idx != -1 and (cut == -1 or idx < cut):
+            cut = idx
+    if cut == -1:
+        return None
+    song = text[:cut].strip()
+    artist = text[cut + 1:].strip()
+    if not song or not artist:
+        return None
+    return song, artist
+
+
+@lru_cache(maxsize=256)
+def parse_track_title(title, suffix="QQ音乐"):
+    """把 “歌名 - 歌手 - QQ音乐” 拆成 {"title", "artist"}，失败返回None
+
+    取代原正则 ^\\s*(.+?)\\s*[—-]\\s*(.+?)(\\s*-\\s*QQ音乐)?\\s*$，只做固定次数的
+    find/strip，耗时与标题长度成线性，不会回溯。与原正则有意不同的地方：
+      - 分隔符除 — 和 - 外还接受 – 和全角 －；
+      - 末尾的后缀（suffix，默认 QQ音乐）前面是任意一种分隔符都会去掉，原正则只认 -；
+      - 去掉首尾空白后歌名或歌手为空时返回None，原正则会返回只有空白的歌名或歌手。
+    结果按标题缓存，标题不变时只需一次字典查找（返回值共享，不要修改）。
+    """
+    text = title.strip()
+    if suffix and text.endswith(suffix):
+        head = text[:-len(suffix)].rstrip()
+        if head and head[-1] in DASHES:
+            parts = _split_once(head[:-1].rstrip())
+            if parts:
+                return {"title": parts[0], "artist": parts[1]}
+    parts = _split_once(text)
+    if parts is None:
+        return None
+    return {"title": parts[0], "artist": parts[1]}
@@ -0,0 +1,35 @@
+# warm_state.py
+import json
+import os
+import time
+
+# --------------------------
+# 启动缓存模块
+# --------------------------
+def load_warm_state(path):
+    """读取上次退出时保存的界面状态，文件不存在或损坏时返回None"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if isinstance(state, dict) else None
+
+
+def save_warm_state(path, track_text, track_color, elapsed, running):
+    """保存最后显示的播放信息和计时状态（临时文件 + 替换）"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            "track_text": track_text,
+            "track_color": track_color,
+            "elapsed": elapsed,
+            "running": running,
+            "saved_at": time.time()
+        }, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def state_age(state, now=None):
+    """缓存距今多少秒"""
+    return (now or time.time()) - state.get("saved_at", 0)
@@ -0,0 +1,232 @@
+# window_events.py
+import time
+
+# --------------------------
+# 窗口事件类型
+# --------------------------
+EVENT_CREATE = "create"
+EVENT_DESTROY = "destroy"
+EVENT_SHOW = "show"
+EVENT_HIDE = "hide"
+EVENT_NAME_CHANGE = "name_change"
+
+
+class WindowEventSource:
+    """窗口事件源接口：窗口创建/销毁/显示/隐藏/标题变化时回调 callback(event, hwnd)"""
+
+    def start(self, callback):
+        raise NotImplementedError
+
+    def stop(self):
+        raise NotImplementedError
+
+
+# --------------------------
+# Windows WinEvent 钩子
+# --------------------------
+class WinEventHookSource(WindowEventSource):
+    """基于 SetWinEventHook 的事件源
+
+    使用 WINEVENT_OUTOFCONTEXT，回调在安装钩子的线程的消息循环里执行，
+    所以必须在Tk主线程调用 start()（Tk的mainloop会泵Windows消息）。
+    提示框、菜单、窗口阴影这类频繁显示隐藏、又不会被任何规则匹配的窗口不转发事件。
+    """
+
+    EVENT_OBJECT_CREATE = 0x8000
+    EVENT_OBJECT_DESTROY = 0x8001
+    EVENT_OBJECT_SHOW = 0x8002
+    EVENT_OBJECT_HIDE = 0x8003
+    EVENT_OBJECT_NAMECHANGE = 0x800C
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    WINEVENT_SKIPOWNPROCESS = 0x0002
+    OBJID_WINDOW = 0
+    CHILDID_SELF = 0
+    GA_ROOT = 2
+    IGNORED_CLASSES = frozenset(("tooltips_class32", "#32768", "SysShadow", "ComboLBox"))
+
+    EVENT_NAMES = {
+        EVENT_OBJECT_CREATE: EVENT_CREATE,
+        EVENT_OBJECT_DESTROY: EVENT_DESTROY,
+        EVENT_OBJECT_SHOW: EVENT_SHOW,
+        EVENT_OBJECT_HIDE: EVENT_HIDE,
+        EVENT_OBJECT_NAMECHANGE: EVENT_NAME_CHANGE,
+    }
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        self._user32 = ctypes.windll.user32
+        self._proc_type = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+        )
+        self._user32.SetWinEventHook.restype = wintypes.HANDLE
+        self._user32.GetAncestor.restype = wintypes.HWND
+        self._class_buffer = ctypes.create_unicode_buffer(256)
+        self._hooks = []
+        self._proc = None
+        self._callback = None
+        self.ignored = 0
+
+    def start(self, callback):
+        self._callback = callback
+        self._proc = self._proc_type(self._on_event)  # 必须保持引用，否则回调会被回收
+        flags = self.WINEVENT_OUTOFCONTEXT | self.WINEVENT_SKIPOWNPROCESS
+        # 两段范围：创建~隐藏，以及标题变化；跳过中间的焦点/位置等高频事件
+        for event_min, event_max in ((self.EVENT_OBJECT_CREATE, self.EVENT_OBJECT_HIDE),
+                                     (self.EVENT_OBJECT_NAMECHANGE, self.EVENT_OBJECT_NAMECHANGE)):
+            hook = self._user32.SetWinEventHook(event_min, event_max, 0, self._proc, 0, 0, flags)
+            if hook:
+                self._hooks.append(hook)
+
+    def stop(self):
+        for hook in self._hooks:
+            self._user32.UnhookWinEvent(hook)
+        self._hooks.clear()
+        self._proc = None
+
+    def _on_event(self, hook, event, hwnd, id_object, id_child, thread_id, event_time):
+        if id_object != self.OBJID_WINDOW or id_child != self.CHILDID_SELF or not hwnd:
+            return
+        # 只关心顶层窗口（销毁事件时窗口可能已无祖先，直接放行）
+        if event != self.EVENT_OBJECT_DESTROY:
+            if self._user32.GetAncestor(hwnd, self.GA_ROOT) != hwnd:
+                return
+            self._user32.GetClassNameW(hwnd, self._class_buffer, len(self._class_buffer))
+            if self._class_buffer.value in self.IGNORED_CLASSES:
+                self.ignored += 1
+                return
+        try:
+            self._callback(self.EVENT_NAMES[event], hwnd)
+        except Exception as e:
+            print(f"[ERROR] 窗口事件处理失败: {str(e)}")
+
+
+# --------------------------
+# 合成事件源
+# --------------------------
+class SyntheticEventFeeder(WindowEventSource):
+    """合成事件源：修改 FakeWindowSource 里的假窗口并同步发出对应事件，用于在Linux上测试"""
+
+    def __init__(self, fake_source):
+        self.source = fake_source
+        self._callback = None
+        self.emitted = 0
+
+    def start(self, callback):
+        self._callback = callback
+
+    def stop(self):
+        self._callback = None
+
+    def emit(self, event, hwnd):
+        self.emitted += 1
+        if self._callback:
+            self._callback(event, hwnd)
+
+    def create_window(self, class_name, title=""):
+        hwnd = self.source.add_window(class_name, title)
+        self.emit(EVENT_CREATE, hwnd)
+        return hwnd
+
+    def destroy_window(self, hwnd):
+        self.source.remove_window(hwnd)
+        self.emit(EVENT_DESTROY, hwnd)
+
+    def set_title(self, hwnd, title):
+        self.source.set_title(hwnd, title)
+        self.emit(EVENT_NAME_CHANGE, hwnd)
+
+
+# --------------------------
+# 本地自测
+# --------------------------
+def self_test(rounds=50):
+    """用合成事件驱动 MonitorWorker（不自己计时，只靠事件唤醒），检查结果和事件到发布的延迟"""
+    import threading
+    from window_monitor import FakeWindowSource, WindowSnapshotEngine
+    from detection_rules import DEFAULT_RULES, RuleMatcher, RuleMonitor
+    from monitor_worker import MonitorWorker
+
+    source = FakeWindowSource()
+    engine = WindowSnapshotEngine(source)
+    monitor = engine.register(RuleMonitor(RuleMatcher(DEFAULT_RULES)))
+    published = threading.Event()
+    worker = MonitorWorker(engine, monitor, interval=None, notify=published.set, event_gap=0)
+    feeder = SyntheticEventFeeder(source)
+    feeder.start(worker.on_event)
+    worker.start()
+    latencies = []
+
+    def expect(change, track, distractions):
+        published.clear()
+        started = time.monotonic()
+        result = change()
+        assert published.wait(1.0), "事件没有唤醒后台线程"
+        latencies.append(time.monotonic() - started)
+        state = worker.drain_latest()
+        assert state.track == track, state
+        assert state.distractions == frozenset(distractions), state
+        return result
+
+    try:
+        for _ in range(100):
+            source.add_window("Shell_TrayWnd", "")  # 无关窗口
+        qq = expect(lambda: feeder.create_window("TXGuiFoundation", "晴天 - 周杰伦 - QQ音乐"),
+                    {"title": "晴天", "artist": "周杰伦"}, ())
+        bili = expect(lambda: feeder.create_window("Chrome_WidgetWin_1", "【4K】xxx_哔哩哔哩 (゜-゜)つロ 干杯~-bilibili"),
+                      {"title": "晴天", "artist": "周杰伦"}, {"bilibili"})
+        for n in range(rounds):
+            expect(lambda: feeder.set_title(qq, f"歌{n} - 歌手{n} - QQ音乐"),
+                   {"title": f"歌{n}", "artist": f"歌手{n}"}, {"bilibili"})
+        expect(lambda: feeder.destroy_window(bili), {"title": f"歌{rounds - 1}", "artist": f"歌手{rounds - 1}"}, ())
+        expect(lambda: feeder.set_title(qq, "QQ音乐"), None, ())
+    finally:
+        worker.stop()
+        feeder.stop()
+    assert worker.errors == 0 and worker.events == feeder.emitted
+    latencies.sort()
+    # 没有轮询，事件到发布只差一次线程唤醒加一次枚举（不计 event_gap）
+    assert latencies[len(latencies) // 2] < 0.05, latencies
+    return latencies
+
+
+def burst_test(events=200, event_gap=0.1):
+    """窗口连续改标题时，事件按 event_gap 合并，枚举次数远少于事件数且最终状态正确"""
+    import threading
+    from window_monitor import FakeWindowSource, WindowSnapshotEngine
+    from detection_rules import DEFAULT_RULES, RuleMatcher, RuleMonitor
+    from monitor_worker import MonitorWorker
+
+    source = FakeWindowSource()
+    engine = WindowSnapshotEngine(source)
+    monitor = engine.register(RuleMonitor(RuleMatcher(DEFAULT_RULES)))
+    worker = MonitorWorker(engine, monitor, interval=None, event_gap=event_gap)
+    feeder = SyntheticEventFeeder(source)
+    feeder.start(worker.on_event)
+    worker.start()
+    try:
+        qq = feeder.create_window("TXGuiFoundation", "QQ音乐")
+        started = time.monotonic()
+        for n in range(events):
+            feeder.set_title(qq, f"歌{n} - 歌手 - QQ音乐")
+            time.sleep(0.001)
+        elapsed = time.monotonic() - started
+        time.sleep(event_gap * 2)
+    finally:
+        worker.stop()
+        feeder.stop()
+    state = worker.drain_latest()
+    assert state.track == {"title": f"歌{events - 1}", "artist": "歌手"}, state
+    # 每个 event_gap 最多一次枚举，另加开头和结尾各一次
+    assert worker.event_ticks <= elapsed / event_gap + 2, (worker.event_ticks, elapsed)
+    return worker.events, worker.event_ticks
+
+
+if __name__ == "__main__":
+    latencies = self_test()
+    print(f"事件 {len(latencies)} 次，延迟中位数 {latencies[len(latencies) // 2] * 1000:.2f}ms，"
+          f"最大 {latencies[-1] * 1000:.2f}ms")
+    events, ticks = burst_test()
+    print(f"连续 {events} 个事件合并为 {ticks} 次枚举")
+    print("自测通过")
@@ -0,0 +1,338 @@
+# window_monitor.py
+import operator
+import sys
+import time
+from collections import namedtuple
+
+
+# --------------------------
+# 窗口记录与数据源
+# --------------------------
+class WindowRecord:
+    """一条可见顶层窗口记录：(句柄, 类名, 标题)
+
+    用 __slots__ 不带 __dict__；创建后不要修改，同一窗口标题不变时会跨tick复用同一个对象。
+    """
+
+    __slots__ = ('hwnd', 'class_name', 'title')
+
+    def __init__(self, hwnd, class_name, title):
+        self.hwnd = hwnd
+        self.class_name = class_name
+        self.title = title
+
+    def __eq__(self, other):
+        if not isinstance(other, WindowRecord):
+            return NotImplemented
+        return (self.hwnd == other.hwnd and self.class_name == other.class_name
+                and self.title == other.title)
+
+    def __hash__(self):
+        return hash((self.hwnd, self.class_name, self.title))
+
+    def __repr__(self):
+        return f"WindowRecord(hwnd={self.hwnd!r}, class_name={self.class_name!r}, title={self.title!r})"
+
+
+class RecordInterner:
+    """按句柄复用 WindowRecord，类名驻留
+
+    标题和类名都没变时返回上一次的记录对象，新读到的字符串随即释放，
+    稳定状态下每个tick几乎不留下新对象；类名用 sys.intern，几十个
+    Chrome_WidgetWin_1 窗口共用一个字符串。
+    """
+
+    def __init__(self):
+        self._records = {}  # 句柄 -> WindowRecord
+        self.created = 0
+        self.reused = 0
+
+    def get(self, hwnd, class_name, title):
+        record = self._records.get(hwnd)
+        if record is not None and record.title == title and record.class_name == class_name:
+            self.reused += 1
+            return record
+        record = WindowRecord(hwnd, sys.intern(class_name), title)
+        self._records[hwnd] = record
+        self.created += 1
+        return record
+
+    def prune(self, alive):
+        """缓存明显多于当前窗口数时，丢掉已经不存在的句柄"""
+        if len(self._records) > 2 * len(alive) + 64:
+            alive = set(alive)
+            for hwnd in [hwnd for hwnd in self._records if hwnd not in alive]:
+                del self._records[hwnd]
+
+
+class WindowSource:
+    """窗口数据源接口，Win32 与内存假数据源都实现它"""
+
+    def enum_windows(self):
+        """依次产出当前所有可见顶层窗口的 WindowRecord（可以是生成器）"""
+        raise NotImplementedError
+
+    def is_window_visible(self, hwnd):
+        """句柄仍然有效且可见"""
+        raise NotImplementedError
+
+    def get_class_name(self, hwnd):
+        """返回类名，句柄失效时返回空字符串"""
+        raise NotImplementedError
+
+    def get_window_text(self, hwnd):
+        """返回标题，句柄失效时返回空字符串"""
+        raise NotImplementedError
+
+
+class Win32WindowSource(WindowSource):
+    """基于 win32gui.EnumWindows 的真实数据源"""
+
+    def __init__(self):
+        import win32gui  # 仅在Windows上需要
+        self._win32gui = win32gui
+        self.interner = RecordInterner()
+
+    def enum_windows(self):
+        """先只收集句柄（很便宜），再逐个查询，调用方可以随时停止以控制耗时
+
+        每个tick都重新读类名：句柄会被系统复用给别的窗口，不能沿用缓存里的类名。
+        """
+        hwnds = []
+        self._win32gui.EnumWindows(lambda hwnd, results: results.append(hwnd) or True, hwnds)
+        interner = self.interner
+        for hwnd in hwnds:
+            if self._win32gui.IsWindowVisible(hwnd):
+                yield interner.get(hwnd, self.get_class_name(hwnd), self.get_window_text(hwnd))
+        interner.prune(hwnds)
+
+    def is_window_visible(self, hwnd):
+        return bool(self._win32gui.IsWindowVisible(hwnd))
+
+    def get_class_name(self, hwnd):
+        try:
+            return self._win32gui.GetClassName(hwnd)
+        except self._win32gui.error:
+            return ""
+
+    def get_window_text(self, hwnd):
+        try:
+            return self._win32gui.GetWindowText(hwnd)
+        except self._win32gui.error:
+            return ""
+
+
+class FakeWindowSource(WindowSource):
+    """内存中的假窗口数据源，用于在Linux上测试和压测监控器"""
+
+    def __init__(self, windows=()):
+        self._windows = {}  # hwnd -> [类名, 标题, 是否可见]
+        self._next_hwnd = 0x10000
+        self.enum_calls = 0
+        self.api_calls = 0  # 单窗口查询次数（IsWindowVisible/GetClassName/GetWindowText）
+        self.interner = RecordInterner()
+        for class_name, title in windows:
+            self.add_window(class_name, title)
+
+    def add_window(self, class_name, title="", visible=True, hwnd=None):
+        """新建窗口，返回句柄；hwnd 用于回放录制的窗口时保留原句柄"""
+        if hwnd is None:
+            hwnd = self._next_hwnd
+            self._next_hwnd += 2
+        else:
+            self._next_hwnd = max(self._next_hwnd, hwnd + 2)
+        self._windows[hwnd] = [class_name, title, visible]
+        return hwnd
+
+    def remove_window(self, hwnd):
+        # 和真实数据源一样不通知 interner，句柄复用只能靠每次读到的类名发现
+        self._windows.pop(hwnd, None)
+
+    def set_title(self, hwnd, title):
+        self._windows[hwnd][1] = title
+
+    def set_visible(self, hwnd, visible):
+        self._windows[hwnd][2] = visible
+
+    def enum_windows(self):
+        self.enum_calls += 1
+        intern = self.interner.get
+        records = [
+            intern(hwnd, class_name, title)
+            for hwnd, (class_name, title, visible) in self._windows.items()
+            if visible
+        ]
+        self.interner.prune(self._windows)
+        return records
+
+    def is_window_visible(self, hwnd):
+        self.api_calls += 1
+        window = self._windows.get(hwnd)
+        return bool(window and window[2])
+
+    def get_class_name(self, hwnd):
+        self.api_calls += 1
+        window = self._windows.get(hwnd)
+        return window[0] if window else ""
+
+    def get_window_text(self, hwnd):
+        self.api_calls += 1
+        window = self._windows.get(hwnd)
+        return window[1] if window else ""
+
+
+# --------------------------
+# 快照差异
+# --------------------------
+# 相邻两次快照按句柄比较的结果：新增的记录、消失的（上一次的）记录、标题变化后的记录。
+# 同一句柄类名变了按 “消失 + 新增” 处理
+SnapshotDiff = namedtuple('SnapshotDiff', ['added', 'removed', 'retitled'])
+EMPTY_DIFF = SnapshotDiff((), (), ())
+
+
+def diff_is_empty(diff):
+    return not (diff.added or diff.removed or diff.retitled)
+
+
+# --------------------------
+# 快照引擎
+# --------------------------
+class WindowSnapshotEngine:
+    """每个tick只枚举一次窗口，把不可变快照分发给所有已注册的监控器
+
+    budget 为每个tick的枚举耗时上限（秒），超出时放弃本次快照，监控器保留上一次状态。
+    每次快照都和上一次按句柄求差异，实现了 on_diff(diff, snapshot) 的监控器只处理变化的窗口；
+    窗口记录按句柄复用，没有任何变化时差异是 EMPTY_DIFF，不用逐个比较。
+    """
+
+    def __init__(self, source, budget=None, clock=time.perf_counter):
+        self.source = source
+        self.budget = budget
+        self.clock = clock
+        self.monitors = []
+        self.snapshot = ()
+        self.index = {}  # 句柄 -> 上一次快照中的记录
+        self.diff = EMPTY_DIFF
+        self.tick_count = 0
+        self.truncated = False  # 最近一次枚举是否超出预算
+        self.overruns = 0
+
+    def register(self, monitor):
+        """注册监控器，监控器需实现 on_snapshot(snapshot)（或 on_diff(diff, snapshot)）"""
+        self.monitors.append(monitor)
+        return monitor
+
+    def tick(self):
+        """枚举一次窗口并通知所有监控器，超出预算时返回None"""
+        self.tick_count += 1
+        self.truncated = False
+        snapshot = self._enumerate()
+        if snapshot is None:
+            self.truncated = True
+            self.overruns += 1
+            return None
+        self.diff = self._diff(snapshot)
+        self.snapshot = snapshot
+        for monitor in self.monitors:
+            on_diff = getattr(monitor, 'on_diff', None)
+            if on_diff is not None:
+                on_diff(self.diff, snapshot)
+            else:
+                monitor.on_snapshot(snapshot)
+        return snapshot
+
+    def _diff(self, snapshot):
+        if snapshot is self.snapshot:
+            return EMPTY_DIFF
+        index = self.index
+        current = {}
+        added = []
+        removed = []
+        retitled = []
+        for record in snapshot:
+            hwnd = record.hwnd
+            current[hwnd] = record
+            old = index.get(hwnd)
+            if old is record:
+                continue
+            if old is None:
+                added.append(record)
+            elif old.class_name != record.class_name:
+                removed.append(old)
+                added.append(record)
+            elif old.title != record.title:
+                retitled.append(record)
+        if len(current) - len(added) != len(index) - len(removed):
+            removed.extend(old for hwnd, old in index.items() if hwnd not in current)
+        self.index = current
+        return SnapshotDiff(tuple(added), tuple(removed), tuple(retitled))
+
+    def _enumerate(self):
+        if self.budget is None:
+            return self._reuse(list(self.source.enum_windows()))
+        clock = self.clock
+        deadline = clock() + self.budget
+        records = []
+        for record in self.source.enum_windows():
+            records.append(record)
+            if clock() > deadline:
+                return None
+        return self._reuse(records)
+
+    def _reuse(self, records):
+        """所有记录都和上一次是同一批对象时，沿用上一次的快照元组"""
+        previous = self.snapshot
+        if len(records) == len(previous) and all(map(operator.is_, records, previous)):
+            return previous
+        return tuple(records)
+
+
+# --------------------------
+# 本地自测：增量处理与完整扫描一致
+# --------------------------
+FUZZ_CLASSES = ("TXGuiFoundation", "Chrome_WidgetWin_1", "Notepad", "Shell_TrayWnd")
+FUZZ_TITLES = ("晴天 - 周杰伦 - QQ音乐", "稻香 - 周杰伦 - QQ音乐", "QQ音乐", "",
+               "【4K】xxx_哔哩哔哩 (゜-゜)つロ 干杯~-bilibili", "新标签页 - Google Chrome", "无标题 - 记事本")
+
+
+def fuzz_incremental(make_monitor, observe, steps=5000, seed=0):
+    """随机增删窗口、改标题、改可见性、复用句柄换类名，每个tick比较两个监控器：
+    一个注册在引擎上走 on_diff，另一个每次对同一快照 on_snapshot 完整扫描。
+    observe(monitor) 返回要比较的结果，不一致时抛出 AssertionError。返回比较次数。
+    """
+    import random
+    rng = random.Random(seed)
+    source = FakeWindowSource()
+    engine = WindowSnapshotEngine(source)
+    incremental = engine.register(make_monitor(source))
+    reference = make_monitor(source)
+    hwnds = []
+    for step in range(steps):
+        for _ in range(rng.randint(0, 3)):
+            action = rng.random()
+            if action < 0.3 or not hwnds:
+                hwnds.append(source.add_window(rng.choice(FUZZ_CLASSES), rng.choice(FUZZ_TITLES)))
+            elif action < 0.45:
+                source.remove_window(hwnds.pop(rng.randrange(len(hwnds))))
+            elif action < 0.8:
+                source.set_title(rng.choice(hwnds), rng.choice(FUZZ_TITLES))
+            elif action < 0.9:
+                hwnd = rng.choice(hwnds)
+                source.set_visible(hwnd, not source.is_window_visible(hwnd))
+            else:
+                # 句柄被系统复用给另一个类的窗口
+                hwnd = rng.choice(hwnds)
+                source.remove_window(hwnd)
+                source.add_window(rng.choice(FUZZ_CLASSES), rng.choice(FUZZ_TITLES), hwnd=hwnd)
+        snapshot = engine.tick()
+        reference.on_snapshot(snapshot)
+        assert observe(incremental) == observe(reference), (step, observe(incremental), observe(reference))
+    return steps
+
+
+if __name__ == "__main__":
+    from detection_rules import DEFAULT_RULES, RuleMatcher, RuleMonitor
+
+    fuzz_incremental(lambda source: RuleMonitor(RuleMatcher(DEFAULT_RULES)),
+                     lambda monitor: (monitor.track, monitor.distractions), 20000)
+    print("自测通过")
@@ -0,0 +1,161 @@
+# window_trace.py
+import argparse
+import json
+import time
+
+from window_monitor import FakeWindowSource, WindowSnapshotEngine
+
+# --------------------------
+# 录制
+# --------------------------
+class TraceRecorder:
+    """把每个tick看到的窗口列表录成轨迹文件，只保存相邻两次快照的差异
+
+    文件每行一条 JSON：第一行是 {"trace": 1, "start": 开始时间}，之后每行一帧
+        {"t": 距开始秒数, "add": [[句柄, 类名, 标题], ...], "del": [句柄, ...], "set": [[句柄, 新标题], ...]}
+    没有变化的tick不写，挂着几个小时的会话也只有几十KB。
+    """
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self.start = clock()
+        self._previous = {}  # 句柄 -> (类名, 标题)
+        self._file = open(path, 'w', encoding='utf-8')
+        self._file.write(json.dumps({"trace": 1, "start": self.start}) + "\n")
+        # 统计
+        self.ticks = 0
+        self.frames = 0
+
+    def record(self, snapshot):
+        """记录一次快照（WindowRecord 序列），有变化时写一帧，返回是否写了"""
+        self.ticks += 1
+        current = {record.hwnd: (record.class_name, record.title) for record in snapshot}
+        previous = self._previous
+        frame = {}
+        added = [[hwnd, class_name, title] for hwnd, (class_name, title) in current.items()
+                 if hwnd not in previous or previous[hwnd][0] != class_name]
+        removed = [hwnd for hwnd in previous
+                   if hwnd not in current or current[hwnd][0] != previous[hwnd][0]]
+        retitled = [[hwnd, title] for hwnd, (class_name, title) in current.items()
+                    if hwnd in previous and previous[hwnd] != (class_name, title)
+                    and previous[hwnd][0] == class_name]
+        if removed:
+            frame["del"] = removed
+        if added:
+            frame["add"] = added
+        if retitled:
+            frame["set"] = retitled
+        self._previous = current
+        if not frame:
+            return False
+        frame["t"] = round(self.clock() - self.start, 3)
+        self._file.write(json.dumps(frame, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.frames += 1
+        return True
+
+    def close(self):
+        self._file.close()
+
+
+def record_source(source, path, interval=1.0, duration=None):
+    """按 interval 秒轮询 source 并录制，duration 秒后（或 Ctrl+C）停止"""
+    recorder = TraceRecorder(path)
+    deadline = None if duration is None else time.monotonic() + duration
+    try:
+        while deadline is None or time.monotonic() < deadline:
+            recorder.record(list(source.enum_windows()))
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        recorder.close()
+    return recorder
+
+
+# --------------------------
+# 回放
+# --------------------------
+def load_trace(path):
+    """读取轨迹文件，返回帧列表（跳过文件头和写了一半的行）"""
+    frames = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                frame = json.loads(line)
+            except ValueError:
+                continue
+            if "t" in frame:
+                frames.append(frame)
+    return frames
+
+
+class TraceReplayer:
+    """把轨迹按帧应用到 FakeWindowSource 上，每帧之后让快照引擎 tick 一次
+
+    speed 为回放倍速，1 为实时，0 表示不等待尽快回放（测试和压测用）。
+    """
+
+    def __init__(self, frames, source=None):
+        self.frames = frames
+        self.source = source if source is not None else FakeWindowSource()
+        self.position = 0
+
+    def apply(self, frame):
+        source = self.source
+        for hwnd in frame.get("del", ()):
+            source.remove_window(hwnd)
+        for hwnd, class_name, title in frame.get("add", ()):
+            source.add_window(class_name, title, hwnd=hwnd)
+        for hwnd, title in frame.get("set", ()):
+            source.set_title(hwnd, title)
+
+    def replay(self, engine, speed=1.0, on_tick=None, sleep=time.sleep):
+        """逐帧回放并 tick 引擎，on_tick(帧时间, 快照) 在每次 tick 之后调用"""
+        last_t = None
+        for frame in self.frames[self.position:]:
+            if speed and last_t is not None and frame["t"] > last_t:
+                sleep((frame["t"] - last_t) / speed)
+            last_t = frame["t"]
+            self.apply(frame)
+            self.position += 1
+            snapshot = engine.tick()
+            if on_tick is not None:
+                on_tick(frame["t"], snapshot)
+        return self.position
+
+
+# --------------------------
+# 命令行：回放轨迹并打印检测结果的变化
+# --------------------------
+def main():
+    from configparser import ConfigParser
+    from detection_rules import RuleMatcher, RuleMonitor, load_rules
+
+    parser = argparse.ArgumentParser(description="回放窗口轨迹，打印检测结果的变化")
+    parser.add_argument("trace", help="debug_qqmusic_title.py --record 录制的轨迹文件")
+    parser.add_argument("--speed", type=float, default=0, help="回放倍速，0 为不等待（默认）")
+    parser.add_argument("--config", default="config.ini", help="从中读取 [Rule:xxx] 识别规则")
+    args = parser.parse_args()
+
+    config = ConfigParser()
+    config.read(args.config, encoding='utf-8')
+    engine = WindowSnapshotEngine(FakeWindowSource())
+    monitor = engine.register(RuleMonitor(RuleMatcher(load_rules(config))))
+    last = {}
+
+    def on_tick(t, snapshot):
+        state = {"track": monitor.get_current_track(), "distractions": sorted(monitor.distractions)}
+        if state != last:
+            print(f"{t:10.3f}s  {state}")
+            last.clear()
+            last.update(state)
+
+    frames = load_trace(args.trace)
+    TraceReplayer(frames, engine.source).replay(engine, args.speed, on_tick)
+    print(f"共 {len(frames)} 帧")
+
+
+if __name__ == "__main__":
+    main()